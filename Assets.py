@@ -0,0 +1,71 @@
+# Cache for images and fonts
+# Every image is loaded from disk, converted to the display's pixel format and scaled only once per process,
+# so going back to the menu or starting another game doesn't load anything again
+# Images can only be converted once the display has been set up (pygame.display.set_mode)
+# Assets can be loaded ahead of time on a background thread (see preload()), the cache is shared with it under a lock
+import threading
+
+import pygame
+
+_lock = threading.RLock()
+_images = {}
+_fonts = {}
+_atlases = {}
+
+
+# Image at path scaled to size (None to keep the original size), converted for fast blitting
+# The same Surface is returned every time, so it should not be drawn on
+def load_image(path, size=None):
+    key = (path, size)
+    with _lock:
+        if key not in _images:
+            if size:
+                _images[key] = pygame.transform.scale(load_image(path), size)
+            else:
+                _images[key] = pygame.image.load(path).convert_alpha()
+        return _images[key]
+
+
+# Images (list of (path, size) like load_image()) packed side by side into one Surface, returns a subsurface for each
+# Drawing from a single atlas keeps every image in one block of memory, and all the images are loaded together
+def load_atlas(images):
+    key = tuple(images)
+    with _lock:
+        if key not in _atlases:
+            # Scaled here rather than with load_image(), so the scaled images are only kept in the atlas
+            scaled = [pygame.transform.scale(load_image(path), size) if size else load_image(path) for path, size in images]
+            atlas = pygame.Surface((sum(image.get_width() for image in scaled), max(image.get_height() for image in scaled)), pygame.SRCALPHA).convert_alpha()
+            atlas.fill((0, 0, 0, 0))
+            subsurfaces = []
+            x = 0
+            for image in scaled:
+                # Copied as is (not blended onto the empty atlas), so every pixel keeps its colour and alpha
+                atlas.blit(image, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+                subsurfaces.append(atlas.subsurface((x, 0), image.get_size()))
+                x += image.get_width()
+            _atlases[key] = subsurfaces
+        return _atlases[key]
+
+
+def load_font(path, size):
+    key = (path, size)
+    with _lock:
+        if key not in _fonts:
+            _fonts[key] = pygame.font.Font(path, size)
+        return _fonts[key]
+
+
+# Run load (a function loading assets with the functions above) on a background thread, returns the thread
+# Whatever it has loaded is in the cache when it's needed, and anything still being loaded is waited for, not loaded twice
+def preload(load):
+    thread = threading.Thread(target=load, daemon=True)
+    thread.start()
+    return thread
+
+
+# Forget everything (e.g. if the display format changes)
+def clear():
+    with _lock:
+        _images.clear()
+        _fonts.clear()
+        _atlases.clear()
@@ -0,0 +1,81 @@
+# Play many games without a display, spread over a pool of processes
+# Used to evaluate ghost target functions and player bots without playing by hand
+# Run as a script for a quick summary, e.g. python Batch.py --games 1000 --workers 4
+import argparse
+import concurrent.futures
+import functools
+import os
+import random
+
+import Game, GameConfig, Maze, PathTable
+
+# Games where nobody gets caught and not every dot is eaten would go on forever
+MAX_FRAMES = 100000
+
+
+# Example policies (policies should be module level functions so they can be sent to worker processes)
+# A policy is called with the game and a random.Random of its own, seeded with the game's seed so the game is reproducible
+# Stand still
+def idle_policy(state, rng):
+    return (0, 0)
+
+# Pick a random direction every cycle
+def random_policy(state, rng):
+    return rng.choice(PathTable.DIRECTIONS)
+
+
+# Play a single game on a maze generated from seed (config.rows x config.cols)
+# ghosts and ai default to the ones in config (a GameConfig.GameConfig)
+# Returns tuple with Win (bool), Points (int), Total points (int), Cycles (int)
+def play_headless(seed, policy=None, max_frames=MAX_FRAMES, ghosts=None, ai=None, config=GameConfig.DEFAULT):
+    game_grid = Maze.generate(config.rows, config.cols, seed=seed)
+
+    # The policy's random numbers don't come from the random module, so the caller's random state is left alone
+    rng = random.Random(seed)
+
+    state = Game.GameState(game_grid, seed, ghosts, ai, config=config)
+    return state.run(policy and (lambda state: policy(state, rng)), max_frames) + (state.cycles(),)
+
+
+# Play a game for every seed, returns list of results in the same order as seeds
+def run_many(seeds, policy=None, workers=None, max_frames=MAX_FRAMES, ghosts=None, ai=None, config=GameConfig.DEFAULT):
+    seeds = list(seeds)
+    play = functools.partial(play_headless, policy=policy, max_frames=max_frames, ghosts=ghosts, ai=ai, config=config)
+
+    if workers == 1:
+        return [play(seed) for seed in seeds]
+
+    if not workers:
+        workers = os.cpu_count() or 1
+
+    # Send games over in chunks, since a single game is too short to be worth a round trip to a worker
+    chunksize = max(1, len(seeds) // (workers*4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(play, seeds, chunksize=chunksize))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many games without a display.")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--policy", choices=["idle", "random"], default="random")
+    # Game parameters, e.g. --ghosts 300 for swarm mode or --ai flow
+    GameConfig.GameConfig.add_arguments(parser)
+    args = parser.parse_args()
+
+    policy = idle_policy if args.policy == "idle" else random_policy
+    results = run_many(range(args.first_seed, args.first_seed + args.games), policy, workers=args.workers, config=GameConfig.GameConfig.from_args(args))
+
+    wins = sum(res[0] for res in results)
+    points = sum(res[1] for res in results)
+    total_dots = sum(res[2] for res in results)
+    cycles = sum(res[3] for res in results)
+    print("Games:", len(results))
+    print("Wins:", wins)
+    print("Points: " + str(points) + "/" + str(total_dots))
+    print("Average cycles:", cycles / max(1, len(results)))
+
+
+if __name__ == "__main__":
+    main()
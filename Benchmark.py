@@ -0,0 +1,220 @@
+# Benchmarks for maze generation, ghost planning, simulation speed and drawing
+# Runs without a window (SDL's dummy video driver) and writes the results as JSON, so runs can be compared over time
+# e.g. python Benchmark.py --output bench_output.json
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+from configs import *
+import Env, Game, GameConfig, Maze, PathTable
+
+# Grid sizes and numbers of ghosts swept through in one process (see bench_config_sweep())
+SWEEP_SIZES = [25, 51, 101]
+SWEEP_GHOSTS = [GHOSTS, 50, SWARM_GHOSTS]
+
+# Grid sizes for each maze algorithm (the slower algorithms aren't run on the largest grids)
+MAZE_SIZES = {
+    "kruskal": [25, 51, 101, 201],
+    "backtracker": [25, 51, 101, 201],
+    "wilson": [25, 51, 101],
+    "fast": [25, 101, 1001, 2001]
+}
+
+
+# Best (lowest) time of repeats runs of func, in seconds
+def best_time(func, repeats):
+    best = None
+    for i in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def bench_maze_generation(repeats):
+    results = []
+    for algorithm, sizes in MAZE_SIZES.items():
+        for size in sizes:
+            seconds = best_time(lambda: Maze.generate(size, size, seed=0, algorithm=algorithm), repeats)
+            results.append({"algorithm": algorithm, "rows": size, "cols": size, "seconds": seconds})
+    return results
+
+
+def bench_path_table(repeats):
+    results = []
+    for size in [25, 51]:
+        game_grid = Maze.generate(size, size, seed=0)
+        seconds = best_time(lambda: PathTable.PathTable(game_grid), repeats)
+        results.append({"rows": size, "cols": size, "ways": game_grid.walkable.count(1), "seconds": seconds})
+    return results
+
+
+# Time per Ghost.plan() call, with the path table and with the straight-line fallback
+def bench_planning(calls):
+    results = {}
+    for mode in ["path_table", "straight_line"]:
+        state = Game.GameState(DEFAULT_GAME_GRID, seed=0)
+        if mode == "straight_line":
+            for ghost in state.ghosts:
+                ghost.path_table = None
+        rng = random.Random(0)
+        ways = [(i % state.game_grid.cols, i // state.game_grid.cols) for i, walkable in enumerate(state.game_grid.walkable) if walkable]
+        positions = [rng.choice(ways) for i in range(calls)]
+
+        ghost = state.ghosts[0]
+        start = time.perf_counter()
+        for gc in positions:
+            ghost.gc = list(gc)
+            ghost.plan(state.player)
+        results[mode] = {"calls": calls, "seconds_per_call": (time.perf_counter() - start) / calls}
+    return results
+
+
+# Time to plan the moves of every ghost for one cycle (GameState.plan_ghosts()), for each ghost AI and number of ghosts
+# "paths" on a maze too large for a path table times its flow field fallback, path_table says which was timed
+def bench_ghost_planning(cycles):
+    results = []
+    for ai in Game.GHOST_AIS:
+        for ghosts in [GHOSTS, SWARM_GHOSTS]:
+            for size in [25, 101]:
+                state = Game.GameState(Maze.generate(size, size, seed=0), seed=0, ghosts=ghosts, ai=ai)
+                rng = random.Random(0)
+                ways = [(i % size, i // size) for i, walkable in enumerate(state.game_grid.walkable) if walkable]
+
+                start = time.perf_counter()
+                for i in range(cycles):
+                    state.player.gc = list(rng.choice(ways))
+                    state.plan_ghosts()
+                results.append({"ai": ai, "ghosts": ghosts, "rows": size, "cols": size, "path_table": state.path_table is not None,
+                                "seconds_per_cycle": (time.perf_counter() - start) / cycles})
+    return results
+
+
+# Simulated player cycles per second with a random player
+# ghosts and ai default to the ones in config, game_grid to the default maze
+def bench_simulation(frames, ghosts=None, ai=None, config=GameConfig.DEFAULT, game_grid=DEFAULT_GAME_GRID):
+    state = Game.GameState(game_grid, seed=0, ghosts=ghosts, ai=ai, config=config)
+    rng = random.Random(0)
+    simulated = 0
+    start = time.perf_counter()
+    while simulated < frames:
+        if state.over():
+            state = Game.GameState(game_grid, seed=simulated, ghosts=ghosts, ai=ai, config=config)
+        if state.player_frame_num == config.player_frames_per_cycle-1:
+            state.steer(rng.choice(PathTable.DIRECTIONS))
+        state.step()
+        simulated += 1
+    elapsed = time.perf_counter() - start
+    return {"ghosts": len(state.ghosts), "ai": state.ai, "frames": frames, "seconds": elapsed, "frames_per_second": frames / elapsed,
+            "cycles_per_second": frames / config.player_frames_per_cycle / elapsed}
+
+
+# Simulation speed for every grid size and number of ghosts in SWEEP_SIZES and SWEEP_GHOSTS, each game with its own GameConfig
+def bench_config_sweep(frames, ai="flow"):
+    results = []
+    for size in SWEEP_SIZES:
+        for ghosts in SWEEP_GHOSTS:
+            config = GameConfig.DEFAULT.replace(rows=size, cols=size, ghosts=ghosts, ai=ai)
+            result = bench_simulation(frames, config=config, game_grid=Maze.generate(config.rows, config.cols, seed=0))
+            results.append(dict(result, rows=config.rows, cols=config.cols))
+    return results
+
+
+# Environment steps (player cycles) per second of a VectorEnv with a random player in every game
+def bench_vector_env(steps, num_envs=64):
+    env = Env.VectorEnv(num_envs, seed=0)
+    env.reset()
+    rng = random.Random(0)
+    actions = [0] * num_envs
+    start = time.perf_counter()
+    for i in range(steps // num_envs):
+        for n in range(num_envs):
+            actions[n] = rng.randrange(len(Env.ACTIONS))
+        env.step(actions)
+    elapsed = time.perf_counter() - start
+    return {"num_envs": num_envs, "steps": steps // num_envs * num_envs, "seconds": elapsed,
+            "steps_per_second": steps // num_envs * num_envs / elapsed}
+
+
+# Time per drawn frame, only updating what changed (draw) and redrawing everything (draw_full)
+def bench_rendering(frames, ghosts=GHOSTS):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import Assets, Render
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    font = Assets.load_font("resources/text/courier.ttf", FONT_SIZE)
+    player_images, ghost_images = Render.load_character_images()
+
+    def new_game(seed):
+        state = Game.GameState(DEFAULT_GAME_GRID, seed=seed, ghosts=ghosts)
+        renderer = Render.Renderer(screen, state, player_images, ghost_images, font)
+        renderer.draw_all()
+        return state, renderer
+
+    results = {"pygame": pygame.version.ver, "ghosts": ghosts}
+    for mode in ["dirty_rects", "full_redraw"]:
+        state, renderer = new_game(0)
+        rng = random.Random(0)
+
+        drawing = 0
+        for i in range(frames):
+            if state.over():
+                state, renderer = new_game(i)
+            draw = renderer.draw if mode == "dirty_rects" else renderer.draw_full
+            if state.player_frame_num == state.config.player_frames_per_cycle-1:
+                state.steer(rng.choice(PathTable.DIRECTIONS))
+            state.step()
+
+            start = time.perf_counter()
+            draw()
+            drawing += time.perf_counter() - start
+        results[mode] = {"frames": frames, "seconds_per_frame": drawing / frames}
+
+    # Cached images belong to this display, which is about to be closed
+    Assets.clear()
+    pygame.quit()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run benchmarks and write the results as JSON.")
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="fewer and shorter runs")
+    parser.add_argument("--skip-rendering", action="store_true")
+    args = parser.parse_args()
+
+    scale = 10 if args.quick else 1
+    results = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "maze_generation": bench_maze_generation(1 if args.quick else args.repeats),
+        "path_table": bench_path_table(1 if args.quick else args.repeats),
+        "planning": bench_planning(100000 // scale),
+        "simulation": bench_simulation(200000 // scale),
+        "swarm_simulation": bench_simulation(20000 // scale, SWARM_GHOSTS),
+        "swarm_flow_simulation": bench_simulation(20000 // scale, SWARM_GHOSTS, "flow"),
+        "ghost_planning": bench_ghost_planning(1000 // scale),
+        "config_sweep": bench_config_sweep(20000 // scale),
+        "vector_env": bench_vector_env(64000 // scale)
+    }
+    if not args.skip_rendering:
+        results["rendering"] = bench_rendering(2000 // scale)
+        results["swarm_rendering"] = bench_rendering(2000 // scale, SWARM_GHOSTS)
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
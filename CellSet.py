@@ -1,31 +1,62 @@
+import array
+
 from configs import *
 
 # Disjoint Set implementation to store grid cells
+# Parents and ranks are stored in flat arrays, and finding is iterative (path halving), so the grid can be very large
 class CellSet:
-    def __init__(self):
+    def __init__(self, rows=ROW, cols=COL):
+        self.rows = rows
+        self.cols = cols
+
         # Disjoint set
-        self.dset = [i for i in range(COL*ROW)]
-        self.drank = [0 for i in range(COL*ROW)]
-    
-    # Hash each row/col pair to an index
+        self.dset = array.array("i", range(rows*cols))
+        self.drank = array.array("B", bytes(rows*cols)) # Union by rank keeps rank below log2(rows*cols)
+
+    # Hash each row/col pair to an index (row-major)
     def dhash(self, x):
-        return x[0]*ROW + x[1]
-    
+        return x[0]*self.cols + x[1]
+
     def dfind(self, i): # i is hashed index
-        if self.dset[i] != i:
-            self.dset[i] = self.dfind(self.dset[i]) # Path compression
-        return self.dset[i]
-    
+        dset = self.dset
+        while dset[i] != i:
+            dset[i] = dset[dset[i]] # Path halving
+            i = dset[i]
+        return i
+
     def dhashfind(self, x): # x is tuple
         return self.dfind(self.dhash(x))
-    
-    def dmerge(self, x, y): # x, y are tuples
-        i = self.dhashfind(x)
-        j = self.dhashfind(y)
+
+    # Merge the sets of two hashed indices, returns True if they were in different sets
+    def dunion(self, i, j):
+        i = self.dfind(i)
+        j = self.dfind(j)
+        if i == j:
+            return False
         if self.drank[i] > self.drank[j]:
             self.dset[j] = i
         elif self.drank[j] > self.drank[i]:
             self.dset[i] = j
         else:
             self.dset[j] = i
-            self.drank[i] += 1
\ No newline at end of file
+            self.drank[i] += 1
+        return True
+
+    def dmerge(self, x, y): # x, y are tuples
+        return self.dunion(self.dhash(x), self.dhash(y))
+
+    # Find for many hashed indices at once, returns list of roots
+    def find_many(self, indices):
+        dset = self.dset
+        roots = []
+        for i in indices:
+            while dset[i] != i:
+                dset[i] = dset[dset[i]]
+                i = dset[i]
+            roots.append(i)
+        return roots
+
+    # Merge many pairs of hashed indices at once, returns list of whether each pair was in different sets
+    def merge_many(self, pairs):
+        dunion = self.dunion
+        return [dunion(i, j) for i, j in pairs]
@@ -9,18 +9,28 @@
 # Each time all Characters are done their animation is referred to as another "cycle"
 # While each animation occurs, events will not be processed until the next cycle
 # When the direction is changed mid-cycle, the change will be stored (to enhance UX) but not processed until next cycle
-import pygame
+
+# Characters only hold game logic (no Pygame), so the game can be simulated without a display
+# Drawing is done by the sprites in Render.py, which observe a Character
 import random
-from configs import *
 
-# Not an abstract class since Python has ugly abstract class implementation
-class Character(pygame.sprite.Sprite):
-    def __init__(self, x, y, game_grid, images, frames_per_cycle): # game_grid should be valid game grid, image should be Surface object
-        super().__init__()
+import GameConfig
+
+# Default ghost target, straight on the player
+# A single function (rather than a lambda per ghost) so ghosts with the same target can be told apart from the rest
+def target_player(player, rng):
+    return player.gc
+
 
+# Not an abstract class since Python has ugly abstract class implementation
+class Character:
+    def __init__(self, x, y, game_grid, frames_per_cycle): # game_grid should be GameGrid object
         # Grid coordinates
         self.gc = [x, y]
 
+        # Grid coordinates at the start of the current move (used to animate between cells)
+        self.prev_gc = [x, y]
+
         # Vector representing character movement direction in terms of grid coordinates
         self.movement = (0, 0)
 
@@ -29,22 +39,16 @@ class Character(pygame.sprite.Sprite):
         # Overhead should be minimal since object references don't take up much memory
         self.game_grid = game_grid
 
-        # Pass images up the constructor
-        self.images = images
-        self.image = self.images[0]
-        self.rect = self.image.get_rect()
-
         # Frames per cycle for particular character
         self.fpc = frames_per_cycle
-    
-    def change_image(self, idx):
-        self.image = self.images[idx]
-    
+
     # Whether a move in a direction is valid
     def valid_move(self, direction): # Direction should be a vector
-        new_gc = (self.gc[0]+direction[0], self.gc[1]+direction[1])
-        return 0 <= new_gc[0] < COL and 0 <= new_gc[1] < ROW and self.game_grid[new_gc[1]][new_gc[0]]
-    
+        x = self.gc[0]+direction[0]
+        y = self.gc[1]+direction[1]
+        grid = self.game_grid
+        return 0 <= x < grid.cols and 0 <= y < grid.rows and grid.walkable[y*grid.cols + x] == 1
+
     # Change direction
     def turn(self, direction):
         if self.valid_move(direction):
@@ -52,25 +56,23 @@ class Character(pygame.sprite.Sprite):
 
     # Move in the specified direction
     def move(self):
+        self.prev_gc = self.gc[:]
         if self.valid_move(self.movement):
             self.gc[0] += self.movement[0]
             self.gc[1] += self.movement[1]
         else:
             self.movement = (0, 0)
 
-    # Align in the center of grid
-    def align(self):
-        self.rect.center = ((self.gc[0] + 0.5) * GRIDWIDTH/COL, (self.gc[1] + 0.5) * GRIDHEIGHT/ROW)
-    
-    # Update position for each frame
-    def update(self):
-        self.rect.center = (self.rect.center[0] + self.movement[0] * GRIDWIDTH/COL / self.fpc, self.rect.center[1] + self.movement[1] * GRIDHEIGHT/ROW / self.fpc)
+    # Put character back at a grid position without animating
+    def respawn(self, x, y):
+        self.gc = [x, y]
+        self.prev_gc = [x, y]
 
 
-# Class for player sprite
+# Class for player
 class Player(Character):
-    def __init__(self, game_grid, images):
-        super().__init__(0, ROW-1, game_grid, images, PLAYER_FRAMES_PER_CYCLE)
+    def __init__(self, game_grid, config=GameConfig.DEFAULT):
+        super().__init__(0, game_grid.rows-1, game_grid, config.player_frames_per_cycle)
 
         # Number of dots eaten
         self.points = 0
@@ -78,28 +80,30 @@ class Player(Character):
         # Number of lives
         self.lives = 3
 
-        self.align()
-    
 
-# Class for ghost sprite
+# Class for ghost
 class Ghost(Character):
-    def __init__(self, game_grid, images, target=None):
-        super().__init__(COL-1, 0, game_grid, images, GHOST_FRAMES_PER_CYCLE)
-        
-        self.image_num = 0 # Current image
-        self.image_delta = 1 # Direction of animation loading
+    def __init__(self, game_grid, target=None, path_table=None, rng=random, config=GameConfig.DEFAULT):
+        super().__init__(game_grid.cols-1, 0, game_grid, config.ghost_frames_per_cycle)
 
         # Function stored as member (since functions are first class) that picks a target point to move towards
+        # It is called with the player and rng (the game's random number generator, so games can be replayed)
         # Default target will always be where the player is
         # target can be overridden to provide individuality
         if not target:
-            target = lambda player: player.gc
+            target = target_player
         self.target = target
+        self.rng = rng
 
-        self.align()
+        # Shortest paths of the maze (see PathTable.py), without it the ghost guesses by straight-line distance
+        self.path_table = path_table
 
     # Ghost AI (also depends on Character.target())
     def plan(self, player):
+        # Follow a shortest path (around walls) to the target
+        if self.path_table:
+            return self.path_table.next_move(self.gc, self.target(player, self.rng))
+
         # Count degrees of freedom and find valid moves
         dof = 0
         valid_moves = []
@@ -107,19 +111,19 @@ class Ghost(Character):
             if self.valid_move(move):
                 dof += 1
                 valid_moves.append(move)
-        
+
         # Ghost cannot backtrack unless stuck with 1 degree of freedom
         backtrack = (-self.movement[0], -self.movement[1])
-        
+
         if dof == 0: # This situation should NOT be happening
             return (0, 0)
         elif dof == 1: # Backing out of corner
             return valid_moves[0]
         elif dof >= 3:
-            target = self.target(player)
+            target = self.target(player, self.rng)
             # Find shortest euclidean distance
             valid_moves.sort(key=lambda mv: (self.gc[0]+mv[0]-target[0])**2 + (self.gc[1]+mv[1]-target[1])**2)
-        
+
         for move in valid_moves:
             if move != backtrack:
                 return move
@@ -0,0 +1,199 @@
+# Clients of the game server (see Server.py)
+# The drawn client is a thin client: it sends the directions of the arrow keys and draws the game it is sent
+# (a Network.Mirror, drawn by the same Render.Renderer as a local game)
+# Simulated clients play with random directions and no display, many at once, to test a server over localhost
+# e.g. python Client.py --room friends, or python Client.py --bots 200 --players 2 --local
+import argparse
+import asyncio
+import queue
+import random
+import socket
+import sys
+import threading
+import time
+
+from configs import *
+import GameConfig, Network, PathTable, Server
+
+
+# Join a room and play in a window, returns tuple with Win (bool), Points (int), Total points (int)
+# config is used for the sizes on screen, the game itself is set up by the server
+def play(screen, host=Server.HOST, port=Server.PORT, room="default", config=GameConfig.DEFAULT):
+    import pygame
+    import Assets, Render
+
+    sock = socket.create_connection((host, port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.sendall(Network.encode_join(room))
+
+    # Messages are read on a thread so waiting for the server never holds up drawing
+    messages = queue.Queue()
+    def receive():
+        try:
+            while True:
+                message = Network.recv_message(sock)
+                messages.put(message)
+                if message is None:
+                    return
+        except (OSError, ValueError):
+            messages.put(None)
+    threading.Thread(target=receive, daemon=True).start()
+
+    courier_prime = Assets.load_font("resources/text/courier.ttf", FONT_SIZE)
+    hud = Render.Hud(courier_prime)
+    screen.fill(BLACK)
+    hud.show(screen, "Waiting for players", (config.width/2, config.height/2))
+    pygame.display.update()
+
+    # Wait for the game to start
+    mirror = None
+    while not mirror:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                sys.exit()
+        try:
+            message = messages.get(timeout=0.05)
+        except queue.Empty:
+            continue
+        if message is None:
+            sys.exit("Disconnected from server")
+        if message[0] == Network.WELCOME:
+            mirror = Network.Mirror(message[1], config)
+
+    clock = pygame.time.Clock()
+    player_sprite_images, ghost_sprite_images = Render.load_character_images(config, config.cell_size(mirror.game_grid.rows, mirror.game_grid.cols))
+    renderer = Render.Renderer(screen, mirror, player_sprite_images, ghost_sprite_images, courier_prime)
+    renderer.draw_all()
+
+    # Time moves on locally between updates, so characters are animated as smoothly as in a local game
+    tick_time = 1 / config.ticks_per_second
+    accumulator = 0
+    prev_time = time.perf_counter()
+
+    while not mirror.over():
+        while not messages.empty():
+            message = messages.get()
+            if message is None:
+                sock.close()
+                return mirror.result()
+            if message[0] == Network.UPDATE:
+                mirror.apply(message[1])
+                accumulator = 0
+
+        now = time.perf_counter()
+        accumulator += min(now - prev_time, MAX_FRAME_TIME)
+        prev_time = now
+        while accumulator >= tick_time:
+            accumulator -= tick_time
+            mirror.tick()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                sys.exit()
+            elif event.type == pygame.KEYDOWN:
+                direction = {pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1), pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0)}.get(event.key)
+                if direction:
+                    sock.sendall(Network.encode_direction(direction))
+
+        renderer.draw(accumulator / tick_time)
+        clock.tick(config.frames_per_second)
+
+    sock.close()
+    return mirror.result()
+
+
+# Statistics of simulated clients
+class BotStats:
+    def __init__(self):
+        self.games = 0
+        self.welcomes = 0
+        self.updates = 0
+        self.update_bytes = 0
+        self.welcome_bytes = 0
+
+        # Longest time between two updates of a game (should be close to a player cycle)
+        self.max_gap = 0
+
+
+# Join a room and play with random directions until the game is over
+async def bot(host, port, room, stats, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(Network.encode_join(room))
+
+    mirror = None
+    last_update = None
+    try:
+        while not (mirror and mirror.over()):
+            message_type, body = await Network.read_message(reader)
+            if message_type == Network.WELCOME:
+                mirror = Network.Mirror(body)
+                stats.welcomes += 1
+                stats.welcome_bytes += len(body) + Network.HEADER.size
+            elif message_type == Network.UPDATE:
+                mirror.apply(body)
+                stats.updates += 1
+                stats.update_bytes += len(body) + Network.HEADER.size
+
+                now = time.perf_counter()
+                if last_update is not None:
+                    stats.max_gap = max(stats.max_gap, now - last_update)
+                last_update = now
+
+                if rng.random() < 0.3:
+                    writer.write(Network.encode_direction(rng.choice(PathTable.DIRECTIONS)))
+        stats.games += 1
+    except asyncio.IncompleteReadError:
+        pass
+    finally:
+        writer.close()
+
+
+# Run simulated clients, players to a room, returns BotStats
+# If local is True, a server is started in the same process (on a free port), with games set up by config
+async def simulate(bots, players=1, host=Server.HOST, port=Server.PORT, local=False, seed=None, config=GameConfig.DEFAULT):
+    server_task = None
+    if local:
+        started = asyncio.get_running_loop().create_future()
+        server_task = asyncio.ensure_future(Server.GameServer(players, config).serve(host, 0, started))
+        port = await started
+
+    stats = BotStats()
+    rng = random.Random(seed)
+    await asyncio.gather(*(bot(host, port, "bots" + str(i // players), stats, random.Random(rng.random())) for i in range(bots)))
+
+    if server_task:
+        server_task.cancel()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play on a game server, or test one with simulated clients.")
+    parser.add_argument("--host", default=Server.HOST)
+    parser.add_argument("--port", type=int, default=Server.PORT)
+    parser.add_argument("--room", default="default")
+    parser.add_argument("--bots", type=int, default=0, help="number of simulated clients to run instead of playing")
+    parser.add_argument("--players", type=int, default=1, help="players in each room (to group simulated clients)")
+    parser.add_argument("--local", action="store_true", help="start a server in this process for the simulated clients")
+    GameConfig.GameConfig.add_arguments(parser)
+    args = parser.parse_args()
+    config = GameConfig.GameConfig.from_args(args)
+
+    if args.bots:
+        start = time.perf_counter()
+        stats = asyncio.run(simulate(args.bots, args.players, args.host, args.port, args.local, config=config))
+        elapsed = time.perf_counter() - start
+        print("Games finished:", stats.games // args.players)
+        print("Updates received:", stats.updates, "(" + str(round(stats.updates / elapsed)) + "/s)")
+        print("Average update size:", round(stats.update_bytes / max(1, stats.updates), 1), "bytes")
+        print("Average welcome size:", round(stats.welcome_bytes / max(1, stats.welcomes), 1), "bytes")
+        print("Longest gap between updates:", round(stats.max_gap, 3), "s")
+        return
+
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((config.width, config.height))
+    print(play(screen, args.host, args.port, args.room, config))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# Environments for training player bots against the ghosts
+# Env is a single game with reset() and step(action), like a Gym environment, and VectorEnv steps many games in lockstep
+# A step is one player cycle, since the player can only change direction at the start of a cycle (see Character.py)
+# Observations are written into buffers that are allocated once, so stepping a game doesn't allocate new ones:
+#   walls: 1 for a wall and 0 for a way, one byte per cell, row by row (shape rows x cols)
+#   dots: 1 if a cell has a dot, one byte per cell, row by row (shape rows x cols)
+#   positions: grid coordinates (x, y) of the player then of every ghost (shape 1+ghosts x 2)
+# With NumPy installed, observations are NumPy arrays viewing those buffers (nothing is copied), otherwise memoryviews
+# Nothing in this file touches Pygame
+import array
+import random
+
+from configs import *
+import Game, GameConfig, GameGrid, Maze, PathTable
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# An action is an index into ACTIONS (the four directions, then standing still)
+ACTIONS = PathTable.MOVES
+
+# Reward for every dot eaten and every time the player is caught
+DOT_REWARD = 1
+CAUGHT_REWARD = -10
+
+# A game is done after this many cycles even if it isn't over (a player can stay out of the ghosts' way for ever)
+MAX_CYCLES = 5000
+
+# Translation table from walkable (1 for a way) to walls (1 for a wall)
+_WALLS = bytes([1, 0]) + bytes(254)
+
+
+# View of a buffer with a shape, a NumPy array if NumPy is installed
+def view(buffer, shape):
+    buffer = memoryview(buffer)
+    if numpy is not None:
+        return numpy.frombuffer(buffer, dtype=buffer.format).reshape(shape)
+    return buffer.cast("B").cast(buffer.format, shape)
+
+
+class Env:
+    # game_grid is the maze every game is played on (list of rows or GameGrid), or None to play each game on a new
+    # maze generated from its seed (config.rows x config.cols, better with ai="flow" since a path table takes a while to build)
+    # ghosts and ai default to the ones in config (a GameConfig.GameConfig)
+    # buffers is (walls, dots, positions) to write observations to instead of allocating them (see VectorEnv)
+    def __init__(self, game_grid=DEFAULT_GAME_GRID, seed=None, ghosts=None, ai=None, max_cycles=MAX_CYCLES, buffers=None, config=GameConfig.DEFAULT):
+        self.game_grid = GameGrid.GameGrid(game_grid) if game_grid is not None else None
+        self.rows = self.game_grid.rows if self.game_grid else config.rows
+        self.cols = self.game_grid.cols if self.game_grid else config.cols
+        self.config = config
+        self.ghosts = ghosts = config.ghosts if ghosts is None else ghosts
+        self.ai = config.ai if ai is None else ai
+        self.max_cycles = max_cycles
+
+        # Seeds of the games played
+        self.rng = random.Random(seed)
+
+        if buffers is None:
+            buffers = (bytearray(self.rows*self.cols), bytearray(self.rows*self.cols), array.array("h", [0]) * (2 + 2*ghosts))
+        self.walls, self.dots, self.positions = buffers
+        self.observation = {
+            "walls": view(self.walls, (self.rows, self.cols)),
+            "dots": view(self.dots, (self.rows, self.cols)),
+            "positions": view(self.positions, (1+ghosts, 2))
+        }
+
+        # Stats of the game being played, updated every step
+        self.info = {"points": 0, "lives": 0, "cycles": 0, "won": False}
+
+        self.state = None
+        self.characters = []
+
+        # Reward of the step being played, added up as events happen (see handle())
+        self.reward = 0
+
+    # Start a new game, returns the first observation
+    def reset(self, seed=None):
+        if seed is None:
+            seed = self.rng.randrange(2**32)
+        game_grid = self.game_grid if self.game_grid else Maze.generate(self.rows, self.cols, seed=seed)
+        self.state = Game.GameState(game_grid, seed, self.ghosts, self.ai, config=self.config)
+        self.state.add_listener(self.handle)
+        self.characters = [self.state.player] + self.state.ghosts
+
+        grid = self.state.game_grid
+        self.walls[:] = grid.walkable.translate(_WALLS)
+        self.dots[:] = GameGrid.unpack_bits(grid.dots, grid.rows*grid.cols)
+        self.write_positions()
+        self.write_info()
+        return self.observation
+
+    def write_positions(self):
+        positions = self.positions
+        i = 0
+        for character in self.characters:
+            positions[i] = character.gc[0]
+            positions[i+1] = character.gc[1]
+            i += 2
+
+    def write_info(self):
+        state = self.state
+        info = self.info
+        info["points"] = state.player.points
+        info["lives"] = state.player.lives
+        info["cycles"] = state.cycles()
+        info["won"] = state.won
+
+    # Scoring for bots, a listener of the game (see Game.GameState.add_listener())
+    # Eaten dots are cleared from the observation as they are eaten, so the dots are never copied again after reset()
+    def handle(self, event, gc):
+        if event == Game.DOT_EATEN:
+            self.dots[gc[1]*self.cols + gc[0]] = 0
+            self.reward += DOT_REWARD
+        elif event == Game.PLAYER_CAUGHT:
+            self.reward += CAUGHT_REWARD
+
+    # Play a cycle with the player heading towards ACTIONS[action], returns (observation, reward, done, info)
+    # The action replaces whatever direction was asked for before (unlike GameState.steer(), which ignores the direction the
+    # player is already moving in), so the move only depends on the action and the observation
+    # The observation and info are the same objects every step, updated in place
+    def step(self, action):
+        state = self.state
+        self.reward = 0
+
+        state.next_dir = ACTIONS[action]
+        state.step_cycle()
+
+        self.write_positions()
+        self.write_info()
+        return self.observation, self.reward, state.over() or state.cycles() >= self.max_cycles, self.info
+
+
+# num_envs games stepped together, every game is reset as soon as it's done
+# Observations of every game are stacked in the same buffers (shapes num_envs x rows x cols and num_envs x 1+ghosts x 2)
+# so a batch can be handed to a model as is, and rewards and dones are buffers of num_envs values
+class VectorEnv:
+    # Arguments are the same as for Env, every game is played on the same maze (or mazes of the same size)
+    def __init__(self, num_envs, game_grid=DEFAULT_GAME_GRID, seed=None, ghosts=None, ai=None, max_cycles=MAX_CYCLES, config=GameConfig.DEFAULT):
+        self.num_envs = num_envs
+        rng = random.Random(seed)
+        game_grid = GameGrid.GameGrid(game_grid) if game_grid is not None else None
+        rows = game_grid.rows if game_grid else config.rows
+        cols = game_grid.cols if game_grid else config.cols
+        if ghosts is None:
+            ghosts = config.ghosts
+
+        cells = rows*cols
+        characters = 2 + 2*ghosts
+        self.walls = bytearray(num_envs*cells)
+        self.dots = bytearray(num_envs*cells)
+        self.positions = array.array("h", [0]) * (num_envs*characters)
+        self.observation = {
+            "walls": view(self.walls, (num_envs, rows, cols)),
+            "dots": view(self.dots, (num_envs, rows, cols)),
+            "positions": view(self.positions, (num_envs, 1+ghosts, 2))
+        }
+
+        walls = memoryview(self.walls)
+        dots = memoryview(self.dots)
+        positions = memoryview(self.positions)
+        self.envs = [Env(game_grid, rng.randrange(2**32), ghosts, ai, max_cycles,
+                         (walls[n*cells:(n+1)*cells], dots[n*cells:(n+1)*cells], positions[n*characters:(n+1)*characters]), config)
+                     for n in range(num_envs)]
+
+        self.rewards = array.array("d", [0]) * num_envs
+        self.dones = bytearray(num_envs)
+
+        # Result of every game finished so far, as tuple with Win (bool), Points (int), Total points (int), Cycles (int)
+        # (the same as Batch.play_headless())
+        self.results = []
+
+    # Start a new game in every environment, returns the observation
+    def reset(self):
+        for env in self.envs:
+            env.reset()
+        return self.observation
+
+    # Play a cycle of every game, actions has an action for each game (e.g. a list, or a NumPy array)
+    # Returns (observation, rewards, dones), which are the same objects every step, updated in place
+    def step(self, actions):
+        rewards = self.rewards
+        dones = self.dones
+        for n, env in enumerate(self.envs):
+            observation, rewards[n], done, info = env.step(actions[n])
+            dones[n] = done
+            if done:
+                self.results.append(env.state.result() + (info["cycles"],))
+                env.reset()
+        return self.observation, rewards, dones
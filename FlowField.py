@@ -0,0 +1,84 @@
+# Flow fields for ghosts
+# A flow field holds, for every cell of a maze, the first move of a shortest path (around walls) to one target cell
+# It is built with a single breadth first search outwards from the target, so ghosts heading for the same target
+# all read their next move from the same field, and a field only costs as much as the maze (not the number of ghosts)
+# Unlike a path table (see PathTable.py), only fields for targets that are actually used are built, so any maze size works
+import collections
+
+import PathTable
+
+# Number of fields kept, targets like the player's position come up again and again
+CACHE_SIZE = 32
+
+
+class FlowFields:
+    def __init__(self, game_grid, cache_size=CACHE_SIZE): # game_grid should be GameGrid object
+        self.rows = rows = game_grid.rows
+        self.cols = cols = game_grid.cols
+
+        # Neighbouring ways of each way, with the direction from the neighbour back to the way (None for walls)
+        walkable = game_grid.walkable
+        self.neighbours = [None] * (rows*cols)
+        for i, way in enumerate(walkable):
+            if way:
+                x, y = i % cols, i // cols
+                self.neighbours[i] = tuple(((y+dy)*cols + x+dx, d ^ 1) for d, (dx, dy) in enumerate(PathTable.DIRECTIONS)
+                                           if 0 <= x+dx < cols and 0 <= y+dy < rows and walkable[(y+dy)*cols + x+dx])
+
+        # Closest way to every cell, so targets anywhere in (or near) the grid can be looked up
+        self.nearest = PathTable.nearest_ways(game_grid)
+
+        # Fields by target (grid index of a way), least recently used first
+        self.fields = collections.OrderedDict()
+        self.cache_size = cache_size
+
+    # Grid index of the way closest to a point (the point can be outside of the grid)
+    def closest(self, point):
+        x = min(max(int(point[0]), 0), self.cols-1)
+        y = min(max(int(point[1]), 0), self.rows-1)
+        return self.nearest[y*self.cols + x]
+
+    # Flow field towards a target way, field[i] is the direction (index into PathTable.DIRECTIONS) to move from cell i
+    # (PathTable.NO_MOVE at the target and for cells that can't reach it)
+    def field(self, target):
+        if target in self.fields:
+            self.fields.move_to_end(target)
+            return self.fields[target]
+
+        # Searched one distance at a time, each way found moves back towards the way it was found from
+        neighbours = self.neighbours
+        field = bytearray([PathTable.NO_MOVE]) * (self.rows*self.cols)
+        seen = bytearray(self.rows*self.cols)
+        seen[target] = 1
+        frontier = [target]
+        while frontier:
+            found = []
+            for u in frontier:
+                for v, d in neighbours[u]:
+                    if not seen[v]:
+                        seen[v] = 1
+                        field[v] = d
+                        found.append(v)
+            frontier = found
+
+        self.fields[target] = field
+        if len(self.fields) > self.cache_size:
+            self.fields.popitem(last=False)
+        return field
+
+    # First move of a shortest path from a way to the way closest to target
+    def next_move(self, gc, target):
+        return PathTable.MOVES[self.field(self.closest(target))[gc[1]*self.cols + gc[0]]]
+
+    # next_move() for many ways and targets at once (e.g. every ghost of a game), each target's field is looked up once
+    def next_moves(self, gcs, targets):
+        cols = self.cols
+        fields = {}
+        moves = []
+        for gc, target in zip(gcs, targets):
+            key = (target[0], target[1])
+            field = fields.get(key)
+            if field is None:
+                field = fields[key] = self.field(self.closest(key))
+            moves.append(PathTable.MOVES[field[gc[1]*cols + gc[0]]])
+        return moves
@@ -0,0 +1,267 @@
+# Headless game engine
+# All the rules of the game (eating dots, getting caught, winning, moving characters) are applied here on plain data
+# Nothing in this file touches Pygame, so a game can be simulated as fast as the CPU allows (for bots, tests and replays)
+# A renderer (see Render.py) can observe a GameState to draw it, but the game does not depend on being drawn
+import array
+import random
+
+import Character, FlowField, GameConfig, GameGrid, PathTable
+
+
+# Ghost target functions (rng is the game's own random.Random, so a game can be replayed from its seed)
+GHOST_TARGET_FUNCTIONS = [
+    None, # Target straight on player
+    lambda player, rng: (player.gc[0] + 8*player.movement[0] + rng.randint(-5, 5), player.gc[1] + 8*player.movement[1] + rng.randint(-5, 5)), # Target somewhere in front of player
+    lambda player, rng: (player.gc[0] - 4*player.movement[0] + rng.randint(-5, 5), player.gc[1] - 4*player.movement[1] + rng.randint(-5, 5)), # Target somewhere behind player
+    lambda player, rng: (player.gc[0] + rng.randint(-15, 15), player.gc[1] + rng.randint(-15, 15)), # Target randomly near player
+    lambda player, rng: (player.gc[0] + rng.randint(-15, 15), player.gc[1] + rng.randint(-15, 15)) # Target randomly near player
+]
+
+# Ways ghosts can plan their moves
+# "paths": each ghost picks its own target and follows the maze's path table (or flow fields, which give the same moves,
+#          on mazes too large for one)
+# "flow": each cycle, ghosts with the same target function share one target, and follow a flow field towards it
+#         (see FlowField.py), so planning costs the same however many ghosts there are, on mazes of any size
+GHOST_AIS = ["paths", "flow"]
+
+# Events that step() can report back to whoever is running the game
+# Each event is reported as a pair of the event and the grid coordinates where it happened, and is also passed to every
+# listener of the game as it happens (see GameState.add_listener()), e.g. a renderer, scoring for bots or a recorder
+DOT_EATEN = "dot"
+PLAYER_CAUGHT = "caught"
+LEVEL_CLEARED = "cleared"
+
+
+class GameState:
+    # game_grid should be list of rows (e.g. DEFAULT_GAME_GRID) or GameGrid, it is copied and never modified
+    # Everything random in the game comes from seed, so the same seed, maze and inputs always give the same game
+    # ghosts is the number of ghosts (hundreds work, see SWARM_GHOSTS), they take turns using the target functions
+    # ai is how ghosts plan their moves (one of GHOST_AIS)
+    # ghosts and ai default to the ones in config (a GameConfig.GameConfig, which also has the frames per cycle)
+    # players is the number of players sharing the maze (see Server.py), player 0 is the one a local game is played with
+    def __init__(self, game_grid, seed=None, ghosts=None, ai=None, players=1, config=GameConfig.DEFAULT):
+        self.game_grid = GameGrid.GameGrid(game_grid)
+        self.config = config
+        if ghosts is None:
+            ghosts = config.ghosts
+        if ai is None:
+            ai = config.ai
+
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+
+        # Spawn points for player and ghosts should not have dots
+        self.player_spawn = (0, self.game_grid.rows-1)
+        self.ghost_spawn = (self.game_grid.cols-1, 0)
+        self.game_grid.eat(*self.player_spawn)
+        self.game_grid.eat(*self.ghost_spawn)
+
+        # For score keeping purposes
+        self.total_dots = self.game_grid.num_dots
+
+        if ai not in GHOST_AIS:
+            raise ValueError("Unknown ghost AI " + repr(ai))
+        self.ai = ai
+
+        # Shortest paths for the ghosts, a path table is shared by every game on the same maze
+        self.path_table = PathTable.get_path_table(self.game_grid) if ai == "paths" else None
+        self.flow_fields = FlowField.FlowFields(self.game_grid) if ai == "flow" or (ai == "paths" and not self.path_table) else None
+
+        # Every player starts at the same spawn point, and has their own points and lives
+        self.players = [Character.Player(self.game_grid, config) for i in range(players)]
+        self.player = self.players[0]
+        self.ghosts = [Character.Ghost(self.game_grid, target=GHOST_TARGET_FUNCTIONS[i % len(GHOST_TARGET_FUNCTIONS)], path_table=self.path_table, rng=self.rng, config=config) for i in range(ghosts)]
+
+        # How movement is represented in this game is explained in the Character class
+        # Frame number
+        self.player_frame_num = 0
+        self.ghost_frame_num = 0
+
+        # Number of frames simulated so far
+        self.frames = 0
+
+        # Store each player's next direction
+        self.next_dirs = [(0, 0)] * players
+
+        # Every change of direction taken by each player, as (cycle, direction), which is all that's needed to replay the game
+        # inputs is player 0's
+        self.player_inputs = [[] for i in range(players)]
+        self.inputs = self.player_inputs[0]
+        self.last_inputs = [(0, 0)] * players
+
+        self.won = False
+
+        # Functions called with (event, gc) for every event as it happens
+        self.listeners = []
+
+        # Align ghosts
+        for ghost, move in zip(self.ghosts, self.plan_ghosts()):
+            ghost.turn(move)
+            ghost.move()
+
+        # Number of ghosts in each cell of the grid, so catching the player is a single lookup however many ghosts there are
+        self.occupancy = array.array("H", [0]) * (self.game_grid.rows*self.game_grid.cols)
+        for ghost in self.ghosts:
+            self.occupancy[self.game_grid.index(*ghost.gc)] += 1
+
+    # Player 0's next direction
+    @property
+    def next_dir(self):
+        return self.next_dirs[0]
+
+    @next_dir.setter
+    def next_dir(self, direction):
+        self.next_dirs[0] = direction
+
+    # Whether the game has finished (every dot eaten, or every player out of lives)
+    def over(self):
+        return self.won or not any(player.lives for player in self.players)
+
+    # Number of player cycles simulated so far
+    def cycles(self):
+        return self.frames // self.config.player_frames_per_cycle
+
+    # Tuple with Win (bool), Points (int), Total points (int)
+    def result(self):
+        return (self.won, self.player.points, self.total_dots)
+
+    # Call listener(event, gc) for every event from now on, as soon as it happens during step()
+    # Listeners are called in the order they were added, once the game is up to date with the event
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    # Report an event, adding it to events (the list step() returns) and passing it to every listener
+    def emit(self, events, event, gc):
+        events.append((event, gc))
+        for listener in self.listeners:
+            listener(event, gc)
+
+    # Store a direction for a player (by number) to take next cycle
+    def steer(self, direction, num=0):
+        if self.players[num].movement != direction:
+            self.next_dirs[num] = direction
+
+    # Kill event
+    def check_caught(self, player=None):
+        player = player or self.player
+        if not self.occupancy[self.game_grid.index(*player.gc)]:
+            return False
+
+        player.lives -= 1
+        player.respawn(*self.player_spawn)
+        player.movement = (0, 0)
+
+        # Only the cells the ghosts were in are cleared, not the whole grid
+        occupancy = self.occupancy
+        cols = self.game_grid.cols
+        for ghost in self.ghosts:
+            occupancy[ghost.gc[1]*cols + ghost.gc[0]] = 0
+            ghost.respawn(*self.ghost_spawn)
+        occupancy[self.game_grid.index(*self.ghost_spawn)] = len(self.ghosts)
+        return True
+
+    # Kill event for every player still playing
+    def check_players(self, events):
+        for player in self.players:
+            if player.lives:
+                gc = tuple(player.gc)
+                if self.check_caught(player):
+                    self.emit(events, PLAYER_CAUGHT, gc)
+
+    # Next move of every ghost, planned together (see GHOST_AIS)
+    # With a path table every ghost is a table lookup (see PathTable.next_moves()), targets are still picked one ghost
+    # at a time and in order, so the game's random numbers are used the same way whatever the number of ghosts
+    # (on a maze too large for a path table, the moves to those targets are read from flow fields instead)
+    # With flow fields only one target is picked for each target function, and every ghost reads its move from that target's field
+    # With more than one player, the ghosts are shared out between the players still playing
+    def plan_ghosts(self):
+        chased = [player for player in self.players if player.lives] or self.players
+        players = [chased[i % len(chased)] for i in range(len(self.ghosts))]
+        if self.ai == "flow":
+            # One target per target function (and player), picked in order of first use
+            targets = {}
+            keys = [(ghost.target, id(player)) for ghost, player in zip(self.ghosts, players)]
+            for ghost, player, key in zip(self.ghosts, players, keys):
+                if key not in targets:
+                    targets[key] = ghost.target(player, self.rng)
+            return self.flow_fields.next_moves([ghost.gc for ghost in self.ghosts], [targets[key] for key in keys])
+        targets = [ghost.target(player, ghost.rng) for ghost, player in zip(self.ghosts, players)]
+        return (self.path_table or self.flow_fields).next_moves([ghost.gc for ghost in self.ghosts], targets)
+
+    # Advance the game by one frame, returns the list of events that happened (which listeners have already been given)
+    # Players can only be caught when they or the ghosts have just moved, which is when the occupancy of their cell changes
+    def step(self):
+        self.frames += 1
+        self.player_frame_num = (self.player_frame_num+1) % self.config.player_frames_per_cycle
+        self.ghost_frame_num = (self.ghost_frame_num+1) % self.config.ghost_frames_per_cycle
+        events = []
+
+        # Process player events
+        if self.player_frame_num == 0:
+            playing = [num for num, player in enumerate(self.players) if player.lives]
+            gc = tuple(self.player.gc)
+            for num in playing:
+                gc = tuple(self.players[num].gc)
+
+                # Eat dot event
+                if self.game_grid.eat(*gc):
+                    self.players[num].points += 1
+                    self.emit(events, DOT_EATEN, gc)
+
+            self.check_players(events)
+
+            # Win event
+            if self.game_grid.num_dots == 0:
+                self.won = True
+                self.emit(events, LEVEL_CLEARED, gc)
+                return events
+
+            # Move players to new direction if possible
+            for num in playing:
+                if self.next_dirs[num] != self.last_inputs[num]:
+                    self.player_inputs[num].append((self.cycles(), self.next_dirs[num]))
+                    self.last_inputs[num] = self.next_dirs[num]
+                self.players[num].turn(self.next_dirs[num])
+                self.players[num].move()
+
+        # Process ghost events
+        if self.ghost_frame_num == 0:
+            self.check_players(events)
+
+            # Move ghosts, keeping track of which cells they are in
+            occupancy = self.occupancy
+            cols = self.game_grid.cols
+            for ghost, move in zip(self.ghosts, self.plan_ghosts()):
+                occupancy[ghost.gc[1]*cols + ghost.gc[0]] -= 1
+                ghost.turn(move)
+                ghost.move()
+                occupancy[ghost.gc[1]*cols + ghost.gc[0]] += 1
+
+        return events
+
+    # Advance the game to the end of the current player cycle, returns the list of events that happened
+    # Gives the same game as calling step() frame by frame, but frames where nothing happens are skipped in one go
+    def step_cycle(self):
+        config = self.config
+        events = []
+        while True:
+            idle = min(config.player_frames_per_cycle - self.player_frame_num, config.ghost_frames_per_cycle - self.ghost_frame_num) - 1
+            self.frames += idle
+            self.player_frame_num += idle
+            self.ghost_frame_num += idle
+            events += self.step()
+            if self.player_frame_num == 0:
+                return events
+
+    # Simulate until the game is over (or max_frames is reached), policy picks the player's direction each cycle
+    def run(self, policy=None, max_frames=None):
+        while not self.over() and (max_frames is None or self.frames < max_frames):
+            if policy and self.player_frame_num == self.config.player_frames_per_cycle-1:
+                self.steer(policy(self))
+            self.step()
+        return self.result()
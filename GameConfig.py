@@ -0,0 +1,98 @@
+# Game parameters that can change from one run (or one game) to the next
+# The defaults are the constants in configs.py, and a GameConfig can be loaded from a JSON file or from command line flags
+# A GameConfig is passed explicitly to whatever needs it (maze generation, games, sprites and the game loop), so games with
+# different parameters can run in the same process (e.g. a benchmark sweeping grid sizes and numbers of ghosts)
+import json
+
+from configs import *
+
+# Every parameter and its default
+FIELDS = {
+    # Number of rows/cols of a generated maze, and of the grid cells that fit in the grid area
+    "rows": ROW,
+    "cols": COL,
+    # Number of rows/cols of a large maze (see LARGE_ROW)
+    "large_rows": LARGE_ROW,
+    "large_cols": LARGE_COL,
+    # Number of ghosts, and how they plan their moves (see Game.GHOST_AIS)
+    "ghosts": GHOSTS,
+    "ai": GHOST_AI,
+    # Frames per cycle (see Character.py) and fixed time steps (see configs.py)
+    "player_frames_per_cycle": PLAYER_FRAMES_PER_CYCLE,
+    "ghost_frames_per_cycle": GHOST_FRAMES_PER_CYCLE,
+    "ticks_per_second": TICKS_PER_SECOND,
+    "frames_per_second": FRAMES_PER_SECOND,
+    # Screen and grid area, in pixels
+    "width": WIDTH,
+    "height": HEIGHT,
+    "grid_width": GRIDWIDTH,
+    "grid_height": GRIDHEIGHT
+}
+
+
+class GameConfig:
+    # Parameters not given keep their defaults (see FIELDS)
+    def __init__(self, **values):
+        for name in values:
+            if name not in FIELDS:
+                raise ValueError("Unknown game parameter " + repr(name))
+        for name, default in FIELDS.items():
+            setattr(self, name, type(default)(values.get(name, default)))
+
+        if self.width < self.grid_width or self.height < self.grid_height:
+            raise ValueError("Grid area doesn't fit on the screen")
+        if min(self.rows, self.cols, self.player_frames_per_cycle, self.ghost_frames_per_cycle, self.ticks_per_second) < 1:
+            raise ValueError("Game parameters must be positive")
+
+    def __repr__(self):
+        return "GameConfig(" + ", ".join(name + "=" + repr(value) for name, value in self.to_dict().items()) + ")"
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in FIELDS}
+
+    # Copy with some parameters changed
+    def replace(self, **values):
+        return GameConfig(**dict(self.to_dict(), **values))
+
+    # Size of a grid cell on screen for a maze of rows x cols (the config's own by default), in pixels
+    # A maze that fits in rows x cols cells is stretched to fill the grid area, a larger one keeps the cells of the
+    # config's size and scrolls (see Render.Renderer)
+    def cell_size(self, rows=None, cols=None):
+        rows = self.rows if rows is None else rows
+        cols = self.cols if cols is None else cols
+        return (self.grid_width / min(cols, self.cols), self.grid_height / min(rows, self.rows))
+
+    # Config from a JSON file with an object of parameters (any not in the file keep their defaults)
+    @classmethod
+    def load(cls, file):
+        with open(file) as f:
+            values = json.load(f)
+        if not isinstance(values, dict):
+            raise ValueError(file + " is not a game config")
+        return cls(**values)
+
+    def save(self, file):
+        with open(file, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    # Add a flag for every parameter (e.g. --ghosts, --player-frames-per-cycle) and --config to an argparse.ArgumentParser
+    # Use from_args() on the parsed arguments
+    @staticmethod
+    def add_arguments(parser):
+        group = parser.add_argument_group("game parameters")
+        group.add_argument("--config", help="JSON file of game parameters (flags override it)")
+        for name, default in FIELDS.items():
+            group.add_argument("--" + name.replace("_", "-"), dest=name, type=type(default), default=None, help="default " + str(default))
+
+    # Config from parsed arguments (see add_arguments())
+    @classmethod
+    def from_args(cls, args):
+        config = cls.load(args.config) if args.config else cls()
+        return config.replace(**{name: getattr(args, name) for name in FIELDS if getattr(args, name) is not None})
+
+
+# Config with every parameter at its default
+DEFAULT = GameConfig()
@@ -0,0 +1,75 @@
+# Compact game grid used by the game rules
+# Ways and walls are stored row by row in a flat bytearray (one byte per cell), which is much smaller than a list of lists
+# and doesn't need Pygame, so it's cheap to make a fresh one for every game
+# The grid layout that's passed in (e.g. DEFAULT_GAME_GRID) is copied and never modified, so it can be reused across games
+# Dots are stored as a bitset (one bit per cell), the same packing used by maze and replay files
+
+# Lookup tables to move a 0/1 byte to bit k and back
+_TO_BIT = [bytes([0, 1 << k]) + bytes(254) for k in range(8)]
+_FROM_BIT = [bytes((v >> k) & 1 for v in range(256)) for k in range(8)]
+
+
+# Pack a sequence of 0s and 1s into bits (cell i is bit i%8 of byte i//8)
+def pack_bits(cells):
+    cells = bytes(cells) + bytes(-len(cells) % 8)
+    packed = 0
+    for k in range(8):
+        packed |= int.from_bytes(cells[k::8].translate(_TO_BIT[k]), "little")
+    return packed.to_bytes(len(cells) // 8, "little")
+
+
+# Unpack n cells packed by pack_bits
+def unpack_bits(packed, n):
+    cells = bytearray(len(packed) * 8)
+    for k in range(8):
+        cells[k::8] = bytes(packed).translate(_FROM_BIT[k])
+    return cells[:n]
+
+
+class GameGrid:
+    # layout should be list of rows, where a truthy cell is a way and a falsy cell is a wall
+    # layout can also be another GameGrid (only its walls are copied), or a flat sequence of 0s and 1s (row by row) if cols is given
+    def __init__(self, layout, cols=None):
+        # Number of rows/cols and walkability map (1 if way, 0 if wall)
+        if isinstance(layout, GameGrid):
+            self.rows = layout.rows
+            self.cols = layout.cols
+            self.walkable = bytearray(layout.walkable)
+        elif cols:
+            self.rows = len(layout) // cols
+            self.cols = cols
+            self.walkable = bytearray(layout)
+        else:
+            self.rows = len(layout)
+            self.cols = len(layout[0])
+            self.walkable = bytearray(1 if cell else 0 for row in layout for cell in row)
+
+        # Dot bitset (bit set if dot in cell is uneaten, see pack_bits()), every way starts with a dot
+        self.dots = bytearray(pack_bits(self.walkable))
+        self.num_dots = self.walkable.count(1)
+
+    # Index of a cell in the flat maps
+    def index(self, x, y):
+        return y*self.cols + x
+
+    # Whether a cell is inside the grid and can be walked on
+    def is_way(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and self.walkable[y*self.cols + x] == 1
+
+    def has_dot(self, x, y):
+        i = y*self.cols + x
+        return self.dots[i >> 3] >> (i & 7) & 1 == 1
+
+    # Remove the dot in a cell, returns True if there was a dot to remove
+    def eat(self, x, y):
+        i = y*self.cols + x
+        bit = 1 << (i & 7)
+        if self.dots[i >> 3] & bit:
+            self.dots[i >> 3] &= ~bit
+            self.num_dots -= 1
+            return True
+        return False
+
+    # Grid as a list of rows of 0s and 1s (same format as DEFAULT_GAME_GRID)
+    def to_list(self):
+        return [list(self.walkable[r*self.cols:(r+1)*self.cols]) for r in range(self.rows)]
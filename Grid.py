@@ -1,44 +1,59 @@
-# Classes for grid sprites
+# Classes for drawing maze cells
+# The maze itself is stored in GameGrid, a cell is only made (and its rect worked out) when it is drawn
+# Cells are drawn straight onto a surface (e.g. a background tile, see Render.MazeTiles) and don't have a Surface of their own
 import pygame
 from configs import *
 
 # Cell of maze
-class Cell(pygame.sprite.Sprite):
-    def __init__(self, x, y, color):
-        super().__init__()
+class Cell:
+    __slots__ = ("gc",)
 
+    # Colour and size (in pixels, on top of the size of a grid cell) of the cell when drawn
+    color = BLACK
+    border = 0
+
+    def __init__(self, x, y):
         # Grid coordinates (starting from top left corner, like Pygame)
-        self.gc = [x, y]
+        self.gc = (x, y)
 
-        self.color = color
+    # Area covered by the cell, in maze pixels, size is the size of a grid cell (see GameConfig.cell_size())
+    def rect(self, size=(GRIDWIDTH/COL, GRIDHEIGHT/ROW)):
+        rect = pygame.Rect(0, 0, size[0] + self.border, size[1] + self.border)
+        rect.center = ((self.gc[0] + 0.5) * size[0], (self.gc[1] + 0.5) * size[1])
+        return rect
+
+    # Draw onto surface, offset is where the top left corner of the maze is on the surface
+    def draw(self, surface, offset=(0, 0), size=(GRIDWIDTH/COL, GRIDHEIGHT/ROW)):
+        rect = self.rect(size).move(offset)
+        # Clipped here since Surface.fill() doesn't clip rects that start above or left of the surface correctly
+        surface.fill(self.color, rect.clip(surface.get_rect()))
+        return rect
 
 
 # Wall of maze
 class Wall(Cell):
-    def __init__(self, x, y):
-        super().__init__(x, y, GREY)
-    
-        self.image = pygame.Surface((GRIDWIDTH/COL + 2, GRIDHEIGHT/ROW + 2))
-        self.image.fill(self.color)
+    __slots__ = ()
 
-        self.rect = self.image.get_rect()
-        self.rect.center = ((self.gc[0] + 0.5) * GRIDWIDTH/COL, (self.gc[1] + 0.5) * GRIDHEIGHT/ROW)
+    color = GREY
+    border = 2
 
 
 # Empty cell of maze ("Way" as in "hallway")
 class Way(Cell):
+    __slots__ = ("dot",)
+
+    color = WHITE
+    border = 8
+
     def __init__(self, x, y, dot=True):
-        super().__init__(x, y, WHITE)
+        super().__init__(x, y)
 
         # True if player can get a point from this cell (i.e., dot inside is uneaten)
         # Spawn points for player and ghosts should not have dots
         self.dot = dot
 
-        self.image = pygame.Surface((GRIDWIDTH/COL + 8, GRIDHEIGHT/ROW + 8))
-        self.image.fill(self.color)
-
-        self.rect = self.image.get_rect()
-        self.rect.center = ((self.gc[0] + 0.5) * GRIDWIDTH/COL, (self.gc[1] + 0.5) * GRIDHEIGHT/ROW)
-
+    def draw(self, surface, offset=(0, 0), size=(GRIDWIDTH/COL, GRIDHEIGHT/ROW)):
+        rect = super().draw(surface, offset, size)
         if self.dot:
-            pygame.draw.circle(self.image, TEAL, (self.rect.width/2, self.rect.height/2), 4)
+            pygame.draw.circle(surface, TEAL, (rect.left + rect.width/2, rect.top + rect.height/2), 4)
+        return rect
@@ -0,0 +1,168 @@
+# Maze generation
+# Kept separate from main.py (and from Pygame) so mazes can be generated without a display
+
+# Cells of the maze are at even grid coordinates, and the grid cells between two of them are the walls that can be knocked down
+# Each algorithm builds a perfect maze (exactly one path between any two cells) in a flat bytearray (row by row, 1 if way)
+# and then knocks down some extra walls so the maze is more "loopy" (otherwise ghosts would be impossible to escape)
+# Algorithms are stored in ALGORITHMS by name, so new ones can be plugged in with the same signature
+import random
+
+from configs import *
+import CellSet, GameGrid
+
+# Default chance of knocking down a wall that isn't needed for a perfect maze
+LOOP_CHANCE = 1/8
+
+# Moves between neighbouring maze cells (x, y)
+STEPS = [(0, 2), (0, -2), (2, 0), (-2, 0)]
+
+
+# Neighbouring maze cells of a grid index
+def neighbours(i, rows, cols):
+    x, y = i % cols, i // cols
+    return [(y+dy)*cols + x+dx for dx, dy in STEPS if 0 <= x+dx < cols and 0 <= y+dy < rows]
+
+
+# Knock down each wall between two maze cells with chance loop_chance
+def add_loops(walkable, rows, cols, rng, loop_chance):
+    for r in range(0, rows, 2):
+        for c in range(0, cols, 2):
+            i = r*cols + c
+            if c+2 < cols and not walkable[i+1] and rng.random() < loop_chance:
+                walkable[i+1] = 1
+            if r+2 < rows and not walkable[i+cols] and rng.random() < loop_chance:
+                walkable[i+cols] = 1
+
+
+# Randomized Kruskal's
+def kruskal(rows, cols, rng, loop_chance):
+    walkable = bytearray(rows*cols)
+
+    # Disjoint Set to store grid cells
+    cell_set = CellSet.CellSet(rows, cols)
+
+    # Edge list
+    edges = []
+    for r in range(0, rows, 2):
+        edges.extend((r*cols + c, r*cols + c+2) for c in range(0, cols-2, 2))
+    for c in range(0, cols, 2):
+        edges.extend((r*cols + c, (r+2)*cols + c) for r in range(0, rows-2, 2))
+    rng.shuffle(edges)
+    for i, j in edges:
+        # Give random chance to add edge so that the maze is more "loopy"
+        if cell_set.dunion(i, j) or rng.random() < loop_chance:
+            walkable[i] = 1
+            walkable[j] = 1
+            walkable[(i+j)//2] = 1
+
+    return walkable
+
+
+# Recursive backtracker (depth first search, with an explicit stack so it works on any size of maze)
+def backtracker(rows, cols, rng, loop_chance):
+    walkable = bytearray(rows*cols)
+    walkable[0] = 1
+    stack = [0]
+    while stack:
+        i = stack[-1]
+        options = [j for j in neighbours(i, rows, cols) if not walkable[j]]
+        if options:
+            j = rng.choice(options)
+            walkable[j] = 1
+            walkable[(i+j)//2] = 1
+            stack.append(j)
+        else:
+            stack.pop()
+
+    add_loops(walkable, rows, cols, rng, loop_chance)
+    return walkable
+
+
+# Wilson's (loop-erased random walks, every perfect maze is equally likely)
+def wilson(rows, cols, rng, loop_chance):
+    walkable = bytearray(rows*cols)
+    cells = [r*cols + c for r in range(0, rows, 2) for c in range(0, cols, 2)]
+    walkable[rng.choice(cells)] = 1
+
+    for start in cells:
+        # Random walk until the maze is reached, remembering the last way out of each cell (which erases loops)
+        exits = {}
+        i = start
+        while not walkable[i]:
+            exits[i] = rng.choice(neighbours(i, rows, cols))
+            i = exits[i]
+
+        # Carve the loop-erased walk
+        i = start
+        while not walkable[i]:
+            j = exits[i]
+            walkable[i] = 1
+            walkable[(i+j)//2] = 1
+            i = j
+
+    add_loops(walkable, rows, cols, rng, loop_chance)
+    return walkable
+
+
+# Fast path for very large mazes: binary tree (every cell opens either north or west)
+# Each row of the grid is built with slices of random bytes instead of looping over cells, so it runs at C speed
+# The mazes are biased (the top row and left column are always open corridors), and loop_chance is rounded to 1/256
+def binary_tree(rows, cols, rng, loop_chance):
+    h = (rows-1)//2 + 1
+    w = (cols-1)//2 + 1
+    n = h*w
+
+    # Random bytes to 0s and 1s, 1 with the given chance
+    def coins(chance):
+        table = bytes(1 if v < chance*256 else 0 for v in range(256))
+        return rng.randbytes(n).translate(table)
+
+    # Bitwise or of two sequences of 0s and 1s
+    def either(a, b):
+        return (int.from_bytes(a, "little") | int.from_bytes(b, "little")).to_bytes(n, "little")
+
+    north = coins(1/2)
+    west = north.translate(bytes([1, 0]) + bytes(254))
+    if loop_chance:
+        north = either(north, coins(loop_chance))
+        west = either(west, coins(loop_chance))
+    north = bytearray(north)
+    west = bytearray(west)
+
+    # Top row can only open west and left column can only open north
+    north[0:w] = bytes(w)
+    west[0:w] = b"\x01" * w
+    north[0::w] = b"\x00" + b"\x01" * (h-1)
+    west[0::w] = bytes(h)
+
+    walkable = bytearray(rows*cols)
+    for i in range(h):
+        start = 2*i*cols
+        walkable[start:start+2*w-1:2] = b"\x01" * w
+        walkable[start+1:start+2*w-1:2] = west[i*w+1:(i+1)*w]
+        if i:
+            walkable[start-cols:start-cols+2*w-1:2] = north[i*w:(i+1)*w]
+
+    return walkable
+
+
+ALGORITHMS = {
+    "kruskal": kruskal,
+    "backtracker": backtracker,
+    "wilson": wilson,
+    "fast": binary_tree
+}
+
+
+# Generate a maze as a GameGrid
+# The maze only depends on the arguments, so the same seed always gives the same maze (rng can be passed instead of seed)
+def generate(rows=ROW, cols=COL, seed=None, algorithm="kruskal", loop_chance=LOOP_CHANCE, rng=None):
+    if rng is None:
+        rng = random.Random(seed)
+
+    walkable = ALGORITHMS[algorithm](rows, cols, rng, loop_chance)
+
+    # Spawn points always need to be ways
+    walkable[(rows-1)*cols] = 1
+    walkable[cols-1] = 1
+    return GameGrid.GameGrid(walkable, cols)
@@ -0,0 +1,115 @@
+# Saving and loading mazes
+# A maze file is a small header (dimensions, seed and how it was generated) followed by its walls packed 8 cells to a byte
+# Files are read through memory mapping, so listing a library only touches the headers
+# Anything precomputed for a maze is stored next to it with the same name and a different extension:
+# its path table (see PathTable.py) and its rendered backgrounds (saved by Render.Renderer, one for each screen size)
+import collections
+import mmap
+import os
+import random
+import struct
+import zlib
+
+from configs import *
+import GameGrid, Maze, PathTable
+
+LIBRARY_DIR = "mazes"
+
+MAZE_EXT = ".maze"
+PATHS_EXT = ".paths"
+BACKGROUND_EXT = ".png"
+
+# Header: magic, version, rows, cols, seed (-1 if unknown), loop chance, algorithm name
+FILE_HEADER = struct.Struct("<4sBIIqd16s")
+FILE_MAGIC = b"DGMZ"
+FILE_VERSION = 1
+
+MazeInfo = collections.namedtuple("MazeInfo", ["name", "rows", "cols", "seed", "algorithm", "loop_chance"])
+
+def write_maze(file, game_grid, seed=None, algorithm="", loop_chance=0):
+    with open(file, "wb") as f:
+        f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, game_grid.rows, game_grid.cols, -1 if seed is None else seed,
+                                 loop_chance, algorithm.encode()))
+        f.write(GameGrid.pack_bits(game_grid.walkable))
+
+
+# Returns the maze as a GameGrid and its MazeInfo
+def read_maze(file, header_only=False):
+    with open(file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        magic, version, rows, cols, seed, loop_chance, algorithm = FILE_HEADER.unpack_from(data)
+        if magic != FILE_MAGIC or version != FILE_VERSION:
+            raise ValueError(file + " is not a maze file")
+
+        name = os.path.splitext(os.path.basename(file))[0]
+        info = MazeInfo(name, rows, cols, None if seed == -1 else seed, algorithm.rstrip(b"\0").decode(), loop_chance)
+        if header_only:
+            return None, info
+
+        packed = data[FILE_HEADER.size:FILE_HEADER.size + (rows*cols + 7) // 8]
+        return GameGrid.GameGrid(GameGrid.unpack_bits(packed, rows*cols), cols), info
+
+
+# Name of a generated maze in a library (the same parameters always give the same maze)
+def maze_name(rows, cols, seed, algorithm, loop_chance):
+    return algorithm + "_" + str(rows) + "x" + str(cols) + "_seed" + str(seed) + "_loop" + str(loop_chance)
+
+
+class MazeLibrary:
+    def __init__(self, directory=LIBRARY_DIR):
+        self.directory = directory
+
+    # Path of a file belonging to the maze called name
+    def file(self, name, ext=MAZE_EXT):
+        return os.path.join(self.directory, name + ext)
+
+    # Path of the rendered background of the maze called name, for the screen and grid area sizes of a GameConfig.GameConfig
+    # (the same maze is drawn differently for other sizes, so each gets its own file)
+    def background_file(self, name, config):
+        return self.file(name, "_" + str(config.width) + "x" + str(config.height) + "_" + str(config.grid_width) + "x" + str(config.grid_height) + BACKGROUND_EXT)
+
+    def exists(self, name):
+        return os.path.exists(self.file(name))
+
+    # MazeInfo of every maze in the library, newest first
+    def entries(self):
+        if not os.path.isdir(self.directory):
+            return []
+        files = [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith(MAZE_EXT)]
+        files.sort(key=os.path.getmtime, reverse=True)
+        entries = []
+        for file in files:
+            try:
+                entries.append(read_maze(file, header_only=True)[1])
+            except (OSError, ValueError, struct.error):
+                pass
+        return entries
+
+    # Load a maze, its path table is loaded as well (or built and saved) so games on it start straight away
+    def load(self, name):
+        game_grid, info = read_maze(self.file(name))
+        PathTable.get_path_table(game_grid, self.file(name, PATHS_EXT))
+        return game_grid
+
+    def save(self, name, game_grid, seed=None, algorithm="", loop_chance=0):
+        os.makedirs(self.directory, exist_ok=True)
+        write_maze(self.file(name), game_grid, seed, algorithm, loop_chance)
+        PathTable.get_path_table(game_grid, self.file(name, PATHS_EXT))
+
+    # Generated maze from the library, it is generated and saved the first time it's asked for
+    # Returns name of maze and the maze as a GameGrid
+    def get(self, rows=ROW, cols=COL, seed=None, algorithm="kruskal", loop_chance=Maze.LOOP_CHANCE):
+        if seed is None:
+            seed = random.randrange(1000000)
+        name = maze_name(rows, cols, seed, algorithm, loop_chance)
+        if not self.exists(name):
+            self.save(name, Maze.generate(rows, cols, seed, algorithm, loop_chance), seed, algorithm, loop_chance)
+        return name, self.load(name)
+
+    # Maze from a fixed layout (e.g. DEFAULT_GAME_GRID), named by its contents so an edited layout gets a new file
+    # Returns name of maze and the maze as a GameGrid
+    def get_layout(self, prefix, layout):
+        game_grid = GameGrid.GameGrid(layout)
+        name = prefix + "_" + format(zlib.crc32(bytes(game_grid.walkable)), "08x")
+        if not self.exists(name):
+            self.save(name, game_grid)
+        return name, self.load(name)
@@ -0,0 +1,235 @@
+# Messages between the game server (Server.py) and its clients (Client.py)
+# Every message is a small header (length of the body, type of message) followed by a body of fields packed with struct
+# When a game starts, each client is sent the whole game once, after that only what changed each player cycle:
+# dots that were eaten, characters that moved and players whose points or lives changed
+# Nothing in this file touches Pygame, so it's shared by the server, the drawn client and simulated clients
+import struct
+
+import Character, Game, GameConfig, GameGrid, PathTable
+
+# Header: length of body, type of message
+HEADER = struct.Struct("<IB")
+
+# Types of message
+JOIN = 1 # Client to server, body is the name of the room to join (UTF-8)
+DIRECTION = 2 # Client to server, body is a direction
+WELCOME = 3 # Server to client when the game starts, body is the whole game (see encode_welcome())
+UPDATE = 4 # Server to client every player cycle, body is what changed (see DeltaEncoder)
+
+# Longest body accepted, so a bad message can't make a reader wait for gigabytes
+MAX_BODY = 1 << 24
+
+# A direction is sent as an index into DIRECTIONS
+DIRECTION_BODY = struct.Struct("<B")
+DIRECTIONS = PathTable.MOVES
+
+# Welcome: player number of the client, number of players, number of ghosts, rows, cols, frame, total dots,
+# player frames per cycle, ghost frames per cycle, followed by the walls and the dots (packed, see GameGrid.pack_bits()), every character's position and every player's stats
+WELCOME_BODY = struct.Struct("<BBHIIIIHH")
+# Position of a character: previous x, previous y, x, y (players first, then ghosts)
+POSITION = struct.Struct("<HHHH")
+# Stats of a player: points, lives
+STATS = struct.Struct("<IB")
+
+# Update: frame, flags (UPDATE_WON, UPDATE_OVER), number of dots eaten, number of moves, number of changed stats
+# followed by the grid index of each dot eaten, each move and each change of stats
+UPDATE_BODY = struct.Struct("<IBHHB")
+UPDATE_WON = 1
+UPDATE_OVER = 2
+DOT = struct.Struct("<I")
+# Move: character number, previous x, previous y, x, y
+MOVE = struct.Struct("<HHHHH")
+# Changed stats: player number, points, lives
+PLAYER_STATS = struct.Struct("<BIB")
+
+
+def encode(message_type, body=b""):
+    return HEADER.pack(len(body), message_type) + body
+
+
+# Read a message from an asyncio.StreamReader, returns (type, body)
+async def read_message(reader):
+    length, message_type = HEADER.unpack(await reader.readexactly(HEADER.size))
+    if length > MAX_BODY:
+        raise ValueError("Message too long")
+    return message_type, await reader.readexactly(length)
+
+
+# Read a message from a blocking socket, returns (type, body), or None if the connection was closed
+def recv_message(sock):
+    header = recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    length, message_type = HEADER.unpack(header)
+    if length > MAX_BODY:
+        raise ValueError("Message too long")
+    body = recv_exactly(sock, length)
+    return None if body is None else (message_type, body)
+
+
+def recv_exactly(sock, n):
+    data = bytearray()
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def encode_join(room):
+    return encode(JOIN, room.encode())
+
+
+def encode_direction(direction):
+    return encode(DIRECTION, DIRECTION_BODY.pack(DIRECTIONS.index(direction)))
+
+
+def decode_direction(body):
+    return DIRECTIONS[DIRECTION_BODY.unpack(body)[0]]
+
+
+# Everything a client needs to draw a game, num is the player number of the client
+def encode_welcome(state, num):
+    grid = state.game_grid
+    body = [WELCOME_BODY.pack(num, len(state.players), len(state.ghosts), grid.rows, grid.cols, state.frames, state.total_dots,
+                              state.config.player_frames_per_cycle, state.config.ghost_frames_per_cycle),
+            GameGrid.pack_bits(grid.walkable), bytes(grid.dots)]
+    body.extend(POSITION.pack(*character.prev_gc, *character.gc) for character in state.players + state.ghosts)
+    body.extend(STATS.pack(player.points, player.lives) for player in state.players)
+    return encode(WELCOME, b"".join(body))
+
+
+# Encodes the changes to a game since the last update (the same update goes to every client of the game)
+class DeltaEncoder:
+    def __init__(self, state):
+        self.state = state
+
+        # What clients were last sent, positions as (previous grid coordinates, grid coordinates) and stats as (points, lives)
+        self.positions = [self.position(character) for character in state.players + state.ghosts]
+        self.stats = [(player.points, player.lives) for player in state.players]
+
+    @staticmethod
+    def position(character):
+        return (tuple(character.prev_gc), tuple(character.gc))
+
+    # eaten is the grid coordinates of every dot eaten since the last update
+    def update(self, eaten):
+        state = self.state
+
+        moves = []
+        for num, character in enumerate(state.players + state.ghosts):
+            position = self.position(character)
+            if position != self.positions[num]:
+                moves.append(MOVE.pack(num, *position[0], *position[1]))
+                self.positions[num] = position
+
+        stats = []
+        for num, player in enumerate(state.players):
+            if (player.points, player.lives) != self.stats[num]:
+                self.stats[num] = (player.points, player.lives)
+                stats.append(PLAYER_STATS.pack(num, player.points, player.lives))
+
+        flags = (UPDATE_WON if state.won else 0) | (UPDATE_OVER if state.over() else 0)
+        body = [UPDATE_BODY.pack(state.frames, flags, len(eaten), len(moves), len(stats))]
+        body.extend(DOT.pack(state.game_grid.index(*gc)) for gc in eaten)
+        return encode(UPDATE, b"".join(body + moves + stats))
+
+
+# Copy of a game on a client, built from a welcome message and kept up to date by updates
+# It has the same attributes as a Game.GameState that a renderer (see Render.py) looks at, so it can be drawn the same way
+# Between updates, tick() moves time on so characters are animated smoothly towards where they were last sent to be
+class Mirror:
+    # config is the client's GameConfig.GameConfig (e.g. for screen sizes), the frames per cycle are the server's
+    def __init__(self, body, config=GameConfig.DEFAULT):
+        num, players, ghosts, rows, cols, self.frames, self.total_dots, player_fpc, ghost_fpc = WELCOME_BODY.unpack_from(body)
+        offset = WELCOME_BODY.size
+        self.config = config.replace(ghosts=ghosts, player_frames_per_cycle=player_fpc, ghost_frames_per_cycle=ghost_fpc)
+
+        packed = (rows*cols + 7) // 8
+        self.game_grid = GameGrid.GameGrid(GameGrid.unpack_bits(body[offset:offset + packed], rows*cols), cols)
+        offset += packed
+        self.game_grid.dots = bytearray(body[offset:offset + packed])
+        self.game_grid.num_dots = GameGrid.unpack_bits(self.game_grid.dots, rows*cols).count(1)
+        offset += packed
+
+        self.players = [Character.Player(self.game_grid, self.config) for i in range(players)]
+        self.ghosts = [Character.Character(0, 0, self.game_grid, ghost_fpc) for i in range(ghosts)]
+        for character in self.players + self.ghosts:
+            x0, y0, x, y = POSITION.unpack_from(body, offset)
+            offset += POSITION.size
+            character.prev_gc = [x0, y0]
+            character.gc = [x, y]
+        for player in self.players:
+            player.points, player.lives = STATS.unpack_from(body, offset)
+            offset += STATS.size
+
+        # The player this client plays with
+        self.num = num
+        self.player = self.players[num]
+
+        self.player_frame_num = self.frames % player_fpc
+        self.ghost_frame_num = self.frames % ghost_fpc
+        self.won = False
+        self.finished = False
+
+        # Functions called with (event, gc) for every event, like Game.GameState's listeners
+        self.listeners = []
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def emit(self, events, event, gc):
+        events.append((event, gc))
+        for listener in self.listeners:
+            listener(event, gc)
+
+    def over(self):
+        return self.finished
+
+    # Tuple with Win (bool), Points (int), Total points (int), like Game.GameState.result()
+    def result(self):
+        return (self.won, self.player.points, self.total_dots)
+
+    # Move time on by a frame (without going past the end of a cycle, the next update starts the next one)
+    def tick(self):
+        self.frames += 1
+        self.player_frame_num = min(self.player_frame_num + 1, self.config.player_frames_per_cycle-1)
+        self.ghost_frame_num = min(self.ghost_frame_num + 1, self.config.ghost_frames_per_cycle-1)
+
+    # Apply an update, returns the list of events that happened (like Game.GameState.step(), only dots eaten and
+    # players losing lives are reported)
+    def apply(self, body):
+        self.frames, flags, dots, moves, stats = UPDATE_BODY.unpack_from(body)
+        offset = UPDATE_BODY.size
+        self.player_frame_num = self.frames % self.config.player_frames_per_cycle
+        self.ghost_frame_num = self.frames % self.config.ghost_frames_per_cycle
+        self.won = bool(flags & UPDATE_WON)
+        self.finished = bool(flags & UPDATE_OVER)
+
+        events = []
+        grid = self.game_grid
+        for (i,) in DOT.iter_unpack(body[offset:offset + dots*DOT.size]):
+            gc = (i % grid.cols, i // grid.cols)
+            if grid.eat(*gc):
+                self.emit(events, Game.DOT_EATEN, gc)
+        offset += dots*DOT.size
+
+        characters = self.players + self.ghosts
+        for num, x0, y0, x, y in MOVE.iter_unpack(body[offset:offset + moves*MOVE.size]):
+            character = characters[num]
+            character.prev_gc = [x0, y0]
+            character.gc = [x, y]
+        offset += moves*MOVE.size
+
+        for num, points, lives in PLAYER_STATS.iter_unpack(body[offset:offset + stats*PLAYER_STATS.size]):
+            player = self.players[num]
+            caught = lives < player.lives
+            player.points = points
+            player.lives = lives
+            if caught:
+                self.emit(events, Game.PLAYER_CAUGHT, tuple(player.gc))
+        return events
@@ -0,0 +1,173 @@
+# Precomputed shortest paths between every pair of ways in a maze
+# Built once per maze with a breadth first search from every way, so ghosts can find the next move of a
+# shortest path (around walls) with a single lookup instead of guessing by straight-line distance
+import array
+import collections
+import os
+import struct
+
+# Move directions, a next hop is stored as an index into this list
+DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+NO_MOVE = len(DIRECTIONS)
+
+# Move for each next hop (NO_MOVE included)
+MOVES = DIRECTIONS + [(0, 0)]
+
+# Tables take (number of ways)^2 bytes and as long to build, so they are only built for mazes up to this many ways
+# (about 1 MB, built in under half a second, e.g. a 41x41 maze), games use flow fields on larger ones (see Game.py)
+MAX_CELLS = 1000
+
+# Number of tables kept in the cache (a batch of random mazes would otherwise keep every table alive)
+CACHE_SIZE = 8
+
+_cache = collections.OrderedDict()
+
+# Header of a saved table: magic, rows, cols, number of ways
+FILE_HEADER = struct.Struct("<4sIII")
+FILE_MAGIC = b"DGP2" # Tables saved with their distances as well (b"DGPT") are built again
+
+
+class PathTable:
+    def __init__(self, game_grid, file=None): # game_grid should be GameGrid object, file can be a table saved by save()
+        self.rows = game_grid.rows
+        self.cols = game_grid.cols
+
+        if file:
+            self.load(file)
+            return
+
+        # Ways are numbered 0 to n-1, cell_index maps a grid index to its way number (-1 for walls)
+        self.cells = [i for i, walkable in enumerate(game_grid.walkable) if walkable]
+        self.cell_index = array.array("i", [-1]) * (self.rows*self.cols)
+        for num, i in enumerate(self.cells):
+            self.cell_index[i] = num
+        n = self.n = len(self.cells)
+
+        # Neighbouring ways of each way, with the direction to get there
+        neighbours = []
+        for i in self.cells:
+            x, y = i % self.cols, i // self.cols
+            neighbours.append([(self.cell_index[(y+dy)*self.cols + x+dx], d) for d, (dx, dy) in enumerate(DIRECTIONS)
+                               if 0 <= x+dx < self.cols and 0 <= y+dy < self.rows and game_grid.walkable[(y+dy)*self.cols + x+dx]])
+
+        # hop[s*n + t] is the direction of the first move on a shortest path from way s to way t
+        self.hop = hop = array.array("B", [NO_MOVE]) * (n*n)
+
+        # Breadth first search outwards from every target, each cell found steps back towards the cell it was found from
+        for t in range(n):
+            seen = bytearray(n)
+            seen[t] = 1
+            queue = collections.deque([t])
+            while queue:
+                u = queue.popleft()
+                for v, d in neighbours[u]:
+                    if not seen[v]:
+                        seen[v] = 1
+                        hop[v*n + t] = d ^ 1 # Opposite direction (directions are stored in opposite pairs)
+                        queue.append(v)
+
+        # Closest way to every cell (walls included), so targets anywhere in (or near) the grid can be looked up
+        self.nearest = array.array("i", (self.cell_index[i] for i in nearest_ways(game_grid)))
+
+    # Save the table so it doesn't have to be built again for the same maze
+    def save(self, file):
+        with open(file, "wb") as f:
+            f.write(FILE_HEADER.pack(FILE_MAGIC, self.rows, self.cols, self.n))
+            for arr in (array.array("i", self.cells), self.nearest, self.hop):
+                arr.tofile(f)
+
+    def load(self, file):
+        with open(file, "rb") as f:
+            magic, rows, cols, n = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != FILE_MAGIC or (rows, cols) != (self.rows, self.cols):
+                raise ValueError("Path table " + file + " is not for this maze")
+            self.n = n
+
+            cells = array.array("i")
+            cells.fromfile(f, n)
+            self.cells = cells.tolist()
+            self.nearest = array.array("i")
+            self.nearest.fromfile(f, rows*cols)
+            self.hop = array.array("B")
+            self.hop.fromfile(f, n*n)
+
+        self.cell_index = array.array("i", [-1]) * (rows*cols)
+        for num, i in enumerate(self.cells):
+            self.cell_index[i] = num
+
+    # Way number of the way closest to a point (the point can be outside of the grid)
+    def closest(self, point):
+        x = min(max(int(point[0]), 0), self.cols-1)
+        y = min(max(int(point[1]), 0), self.rows-1)
+        return self.nearest[y*self.cols + x]
+
+    # First move of a shortest path from a way to the way closest to target
+    def next_move(self, gc, target):
+        s = self.cell_index[gc[1]*self.cols + gc[0]]
+        hop = self.hop[s*self.n + self.closest(target)]
+        return DIRECTIONS[hop] if hop != NO_MOVE else (0, 0)
+
+    # next_move() for many ways and targets at once (e.g. every ghost of a game)
+    # Many ghosts share a target, so the closest way to each target is only looked up once
+    def next_moves(self, gcs, targets):
+        cols, n, hop, cell_index = self.cols, self.n, self.hop, self.cell_index
+        closest = {}
+        moves = []
+        for gc, target in zip(gcs, targets):
+            key = (target[0], target[1])
+            t = closest.get(key)
+            if t is None:
+                t = closest[key] = self.closest(key)
+            moves.append(MOVES[hop[cell_index[gc[1]*cols + gc[0]]*n + t]])
+        return moves
+
+
+# Grid index of the closest way to every cell of a grid (walls included, -1 if the grid has no ways)
+# Found with a breadth first search outwards from every way at once
+def nearest_ways(game_grid):
+    rows, cols = game_grid.rows, game_grid.cols
+    nearest = array.array("i", [-1]) * (rows*cols)
+    queue = collections.deque()
+    for i, walkable in enumerate(game_grid.walkable):
+        if walkable:
+            nearest[i] = i
+            queue.append(i)
+    while queue:
+        i = queue.popleft()
+        x, y = i % cols, i // cols
+        for dx, dy in DIRECTIONS:
+            if 0 <= x+dx < cols and 0 <= y+dy < rows and nearest[(y+dy)*cols + x+dx] == -1:
+                nearest[(y+dy)*cols + x+dx] = nearest[i]
+                queue.append((y+dy)*cols + x+dx)
+    return nearest
+
+
+# Path table for a grid, only built the first time a maze is seen
+# If file is given, the table is loaded from it (or saved to it after being built, or if it was built without a file)
+# Returns None if the maze is too large for a table
+def get_path_table(game_grid, file=None):
+    key = (game_grid.cols, bytes(game_grid.walkable))
+    if key in _cache:
+        _cache.move_to_end(key)
+        if file and not os.path.exists(file):
+            _cache[key].save(file)
+        return _cache[key]
+
+    if game_grid.walkable.count(1) > MAX_CELLS:
+        return None
+
+    table = None
+    if file and os.path.exists(file):
+        try:
+            table = PathTable(game_grid, file)
+        except (OSError, ValueError, EOFError):
+            table = None
+    if not table:
+        table = PathTable(game_grid)
+        if file:
+            table.save(file)
+
+    _cache[key] = table
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return table
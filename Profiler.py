@@ -0,0 +1,111 @@
+# Frame profiler
+# Times each phase of a frame of play(), keeps rolling percentiles of the last frames and shows them next to Points/Lives
+# Turned on with the DG_PROFILE environment variable, and DG_PROFILE_CSV can be set to a file to save the time of every frame
+# e.g. DG_PROFILE=1 DG_PROFILE_CSV=frames.csv python main.py
+import collections
+import csv
+import os
+import time
+
+from configs import *
+import Assets
+
+# Phases of a frame, in the order they happen
+PHASES = ["simulation", "events", "draw", "animation", "sprites", "display"]
+
+# Number of frames percentiles are taken over
+WINDOW = 300
+
+# Frames between updates of the overlay (drawing it every frame would show up in the profile)
+OVERLAY_INTERVAL = 25
+
+
+class FrameProfiler:
+    def __init__(self, csv_file=None, window=WINDOW):
+        # Rolling times (seconds) of each phase, and of the whole frame
+        self.history = {phase: collections.deque(maxlen=window) for phase in PHASES + ["total"]}
+
+        self.frame_num = 0
+        self.times = dict.fromkeys(PHASES, 0)
+        self.frame_start = self.last = time.perf_counter()
+
+        self.csv_file = None
+        self.csv_writer = None
+        if csv_file:
+            self.csv_file = open(csv_file, "w", newline="")
+            self.csv_writer = csv.writer(self.csv_file)
+            self.csv_writer.writerow(["frame", "total"] + PHASES)
+
+        # Rendered lines of the overlay, and where they are on screen
+        self.overlay = []
+        self.overlay_rect = None
+
+    def begin_frame(self):
+        self.times = dict.fromkeys(PHASES, 0)
+        self.frame_start = self.last = time.perf_counter()
+
+    # Add the time since the last lap to a phase
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.times[phase] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        total = time.perf_counter() - self.frame_start
+        for phase in PHASES:
+            self.history[phase].append(self.times[phase])
+        self.history["total"].append(total)
+        if self.csv_writer:
+            self.csv_writer.writerow([self.frame_num, total] + [self.times[phase] for phase in PHASES])
+        self.frame_num += 1
+
+    # Time (seconds) that p% of recent frames spent at most in a phase
+    def percentile(self, phase, p):
+        times = sorted(self.history[phase])
+        if not times:
+            return 0
+        return times[min(len(times)-1, int(len(times) * p / 100))]
+
+    # Lines of text of the overlay
+    def summary(self):
+        lines = ["ms      p50   p95"]
+        for phase in PHASES + ["total"]:
+            lines.append(phase[:7].ljust(7) + format(self.percentile(phase, 50)*1000, "6.2f") + format(self.percentile(phase, 95)*1000, "6.2f"))
+        return lines
+
+    # Draw the overlay in the side panel, returns list of areas of screen that changed
+    # The text only changes every OVERLAY_INTERVAL frames, redraw draws it anyway (e.g. after the screen was cleared)
+    # topleft is where the overlay goes on screen
+    def draw_overlay(self, screen, redraw=False, topleft=(GRIDWIDTH + 20, HEIGHT*3/4)):
+        if self.frame_num % OVERLAY_INTERVAL == 0:
+            font = Assets.load_font("resources/text/courier.ttf", FONT_SIZE//2)
+            self.overlay = [font.render(line, True, WHITE, BLACK) for line in self.summary()]
+        elif not redraw:
+            return []
+
+        dirty = []
+        if self.overlay_rect:
+            dirty.append(screen.fill(BLACK, self.overlay_rect))
+
+        top = topleft[1]
+        self.overlay_rect = None
+        for text in self.overlay:
+            text_rect = text.get_rect()
+            text_rect.topleft = (topleft[0], top)
+            top = text_rect.bottom
+            dirty.append(screen.blit(text, text_rect))
+            self.overlay_rect = text_rect if not self.overlay_rect else self.overlay_rect.union(text_rect)
+        return dirty
+
+    def close(self):
+        if self.csv_file:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
+
+
+# Profiler if turned on by the environment variables, otherwise None
+def from_environment():
+    if not os.environ.get("DG_PROFILE") and not os.environ.get("DG_PROFILE_CSV"):
+        return None
+    return FrameProfiler(os.environ.get("DG_PROFILE_CSV"))
@@ -0,0 +1,422 @@
+# Classes for drawing a game
+# The renderer only observes a GameState (see Game.py) and never changes it
+import collections
+import os
+
+import pygame
+
+from configs import *
+import Assets, Game, GameConfig, Grid
+
+
+# Center of a grid cell in pixels, size is the size of a grid cell (see GameConfig.cell_size())
+def cell_center(gc, size=(GRIDWIDTH/COL, GRIDHEIGHT/ROW)):
+    return ((gc[0] + 0.5) * size[0], (gc[1] + 0.5) * size[1])
+
+
+# Images for the player and for each ghost, scaled to the size of a grid cell (cell_size, by default the config's)
+# They are all subsurfaces of a single atlas (see Assets.load_atlas())
+def load_character_images(config=GameConfig.DEFAULT, cell_size=None):
+    width, height = (int(size) for size in cell_size or config.cell_size())
+    images = [("resources/player/player.png", (width, height))]
+    images.extend(("resources/ghost/" + str(i) + str(j) + ".png", (width+4, height+4)) for i in range(GHOST_IMAGE_SETS) for j in range(ANIMATION_FRAMES))
+    atlas = Assets.load_atlas(images)
+    player_images = atlas[:1]
+    ghost_images = [atlas[1 + i*ANIMATION_FRAMES:1 + (i+1)*ANIMATION_FRAMES] for i in range(GHOST_IMAGE_SETS)]
+    return player_images, ghost_images
+
+
+# Images of an animation that goes back and forth, staying on the first and last image for two steps
+# (0, 1, ..., n-1, n-1, ..., 1, 0, and again)
+def ping_pong(num_images):
+    return list(range(num_images)) + list(range(num_images-1, -1, -1))
+
+
+ANIMATION_SEQUENCE = ping_pong(ANIMATION_FRAMES)
+
+
+# Image of a ghost animation for every game frame, over a whole period of the animation
+# The animation moves on every FRAMES_PER_ANIMATION_CYCLE frames of a ghost cycle, so this is worked out once and the image
+# for a frame is a single lookup (table[frame % len(table)])
+def frame_table(sequence, ghost_frames_per_cycle=GHOST_FRAMES_PER_CYCLE):
+    table = []
+    steps = 0
+    for frame in range(ghost_frames_per_cycle * len(sequence)):
+        if frame and frame % ghost_frames_per_cycle % FRAMES_PER_ANIMATION_CYCLE == 0:
+            steps += 1
+        table.append(sequence[steps % len(sequence)])
+    return table
+
+
+# Sprite that draws a Character
+class CharacterSprite(pygame.sprite.Sprite):
+    # images should be list of Surface objects, cell_size is the size of a grid cell on screen (see GameConfig.cell_size())
+    def __init__(self, character, images, cell_size=GameConfig.DEFAULT.cell_size()):
+        super().__init__()
+
+        self.character = character
+        self.cell_size = cell_size
+
+        self.images = images
+        self.image = self.images[0]
+        self.rect = self.image.get_rect()
+
+        if self.character:
+            self.align()
+
+    def change_image(self, idx):
+        self.image = self.images[idx]
+
+    # Align in the center of grid
+    def align(self):
+        self.rect.center = cell_center(self.character.gc, self.cell_size)
+
+    # Update position for each frame, progress is how far (from 0 to 1) the character is through its current move
+    def update(self, progress):
+        start = cell_center(self.character.prev_gc, self.cell_size)
+        end = cell_center(self.character.gc, self.cell_size)
+        self.rect.center = (start[0] + (end[0]-start[0]) * progress, start[1] + (end[1]-start[1]) * progress)
+
+
+# Sprite that draws a Ghost (character can be None for a ghost that's only for show)
+class GhostSprite(CharacterSprite):
+    def __init__(self, ghost, images, cell_size=GameConfig.DEFAULT.cell_size()):
+        super().__init__(ghost, images, cell_size)
+
+        self.sequence = ping_pong(len(images)) # Images of the animation, back and forth
+        self.step = 0 # Current place in the sequence
+
+    # Go to the next image of the animation
+    def animate(self):
+        self.step = (self.step + 1) % len(self.sequence)
+        self.change_image(self.sequence[self.step])
+
+
+# Above this many areas to clean up, redrawing the whole screen is quicker than updating each area (e.g. swarm mode)
+MAX_DIRTY_RECTS = 100
+
+
+# Number of rendered texts the HUD keeps around
+HUD_CACHE_SIZE = 32
+
+
+# Text in the side panel (Points/Lives)
+# Rendered text is cached, and text is only drawn again when it changes
+class Hud:
+    def __init__(self, font, cache_size=HUD_CACHE_SIZE):
+        self.font = font
+
+        # Rendered text surfaces, least recently used first
+        self.cache = collections.OrderedDict()
+        self.cache_size = cache_size
+
+        # Text currently on screen and where it is, by center position
+        self.shown = {}
+
+    # Rendered surface for a text
+    def render(self, text):
+        if text in self.cache:
+            self.cache.move_to_end(text)
+        else:
+            self.cache[text] = self.font.render(text, True, WHITE, BLACK)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return self.cache[text]
+
+    # Show text centered at center, returns list of areas of screen that changed (empty if the text is already shown)
+    def show(self, screen, text, center):
+        shown = self.shown.get(center)
+        if shown and shown[0] == text:
+            return []
+
+        dirty = []
+        # Clear old text, which may be wider than the new text
+        if shown:
+            dirty.append(screen.fill(BLACK, shown[1]))
+
+        text_surface = self.render(text)
+        text_rect = text_surface.get_rect()
+        text_rect.center = center
+        dirty.append(screen.blit(text_surface, text_rect))
+        self.shown[center] = (text, text_rect)
+        return dirty
+
+    # Forget what is on screen (e.g. after the screen is cleared)
+    def reset(self):
+        self.shown.clear()
+
+
+# Cells along each side of a background tile
+TILE_CELLS = 8
+
+# Number of background tiles kept (a screen shows at most a handful, so this doesn't grow with the maze)
+TILE_CACHE_SIZE = 64
+
+
+# Walls, ways and dots of a maze, drawn in square tiles of TILE_CELLS x TILE_CELLS cells
+# A tile is only drawn the first time a part of it is on screen, so mazes of any size only cost as much as what's shown
+# Positions are in maze pixels, where the top left corner of the maze is (0, 0)
+class MazeTiles:
+    def __init__(self, game_grid, config=GameConfig.DEFAULT, cache_size=TILE_CACHE_SIZE):
+        self.game_grid = game_grid
+
+        self.cell_size = config.cell_size(game_grid.rows, game_grid.cols)
+        self.tile_width = int(TILE_CELLS * self.cell_size[0])
+        self.tile_height = int(TILE_CELLS * self.cell_size[1])
+
+        # Drawn tiles by (tile x, tile y), least recently used first
+        self.tiles = collections.OrderedDict()
+        self.cache_size = cache_size
+
+    # Size of the whole maze in pixels
+    def size(self):
+        return (int(self.game_grid.cols * self.cell_size[0]), int(self.game_grid.rows * self.cell_size[1]))
+
+    def tile(self, tx, ty):
+        key = (tx, ty)
+        if key in self.tiles:
+            self.tiles.move_to_end(key)
+        else:
+            self.tiles[key] = self.draw_tile(tx, ty)
+            if len(self.tiles) > self.cache_size:
+                self.tiles.popitem(last=False)
+        return self.tiles[key]
+
+    def draw_tile(self, tx, ty):
+        tile = pygame.Surface((self.tile_width, self.tile_height)).convert()
+        tile.fill(BLACK)
+        left, top = tx * self.tile_width, ty * self.tile_height
+
+        # Ways are drawn larger than a cell and spill into the cells around them, so cells just outside the tile are drawn as well
+        grid = self.game_grid
+        cols = range(max(0, tx*TILE_CELLS - 1), min(grid.cols, (tx+1)*TILE_CELLS + 1))
+        rows = range(max(0, ty*TILE_CELLS - 1), min(grid.rows, (ty+1)*TILE_CELLS + 1))
+        walls = [Grid.Wall(c, r) for r in rows for c in cols if not grid.is_way(c, r)]
+        ways = [Grid.Way(c, r, dot=grid.has_dot(c, r)) for r in rows for c in cols if grid.is_way(c, r)]
+        for cell in walls + ways:
+            cell.draw(tile, (-left, -top), self.cell_size)
+        return tile
+
+    # Draw the part of the maze inside view (a Rect in maze pixels) onto surface at dest
+    def draw(self, surface, view, dest=(0, 0)):
+        clip = surface.get_clip()
+        surface.set_clip(pygame.Rect(dest, view.size))
+
+        width, height = self.size()
+        for ty in range(max(0, view.top // self.tile_height), min(view.bottom, height - 1) // self.tile_height + 1):
+            for tx in range(max(0, view.left // self.tile_width), min(view.right, width - 1) // self.tile_width + 1):
+                surface.blit(self.tile(tx, ty), (dest[0] + tx*self.tile_width - view.left, dest[1] + ty*self.tile_height - view.top))
+
+        surface.set_clip(clip)
+
+    # Draw over an area of the maze (e.g. a dot that was eaten) in the tiles that are already drawn
+    def fill(self, color, rect):
+        for (tx, ty), tile in self.tiles.items():
+            tile.fill(color, rect.move(-tx * self.tile_width, -ty * self.tile_height).clip(tile.get_rect()))
+
+
+class Renderer:
+    # background_file can be an image of the background saved by an earlier game on the same maze, with the same screen and
+    # grid area sizes (see MazeLibrary.background_file())
+    # Sizes and frames per cycle come from the game's config (state.config), player_images and ghost_images should be
+    # scaled to the size of the maze's cells (see load_character_images())
+    # The renderer listens to the game's events (see handle()), so whoever runs the game doesn't have to pass them on
+    def __init__(self, screen, state, player_images, ghost_images, font, background_file=None):
+        self.screen = screen
+        self.state = state
+        self.config = config = state.config
+        self.cell_size = config.cell_size(state.game_grid.rows, state.game_grid.cols)
+        self.hud = Hud(font)
+
+        # Points/Lives only change with an event, so they are only drawn again after one
+        self.hud_changed = False
+
+        # Mazes larger than the grid area scroll, the camera is the part of the maze (in maze pixels) that is shown
+        self.maze = MazeTiles(state.game_grid, config)
+        self.viewport = pygame.Rect(0, 0, config.grid_width, config.grid_height)
+        self.camera = self.viewport.copy()
+        self.scrolls = state.game_grid.cols > config.cols or state.game_grid.rows > config.rows
+
+        # Everything that doesn't move (walls, ways and dots) on screen is drawn onto a background
+        # Each frame, only the areas under characters are restored from it (or the whole grid area once the camera moves)
+        # A saved background has every dot, so it can only be used at the start of a game (and only for mazes that don't scroll)
+        self.background = None
+        fresh = state.game_grid.num_dots == state.total_dots and not self.scrolls
+        if background_file and fresh and os.path.exists(background_file):
+            image = pygame.image.load(background_file)
+            if image.get_size() == screen.get_size():
+                self.background = image.convert()
+
+        # Sprites of every player, the camera follows the one the game is played with (state.player)
+        self.players = [CharacterSprite(player, player_images, self.cell_size) for player in state.players]
+        self.player = self.players[state.players.index(state.player)]
+        self.ghosts = pygame.sprite.Group(GhostSprite(ghost, ghost_images[i % len(ghost_images)], self.cell_size) for i, ghost in enumerate(state.ghosts))
+        self.follow()
+
+        if not self.background:
+            self.background = self.draw_background()
+            if background_file and fresh:
+                pygame.image.save(self.background, background_file)
+
+        # Every ghost shows the same image of its animation (looked up in ghost_animation by game frame, see frame_table())
+        self.ghost_animation = frame_table(ANIMATION_SEQUENCE, config.ghost_frames_per_cycle)
+        self.ghost_image_num = 0
+
+        # Parts of screen drawn over last frame, which need to be cleaned up this frame
+        self.prev_dirty = []
+
+        # Optional Profiler.FrameProfiler timing each phase of drawing
+        self.profiler = None
+
+        state.add_listener(self.handle)
+
+    # Draw walls, ways and dots under the camera
+    def draw_background(self):
+        background = pygame.Surface(self.screen.get_size()).convert()
+        background.fill(BLACK)
+        self.maze.draw(background, self.camera, self.viewport.topleft)
+        return background
+
+    # Move the camera to keep the player in the middle (as far as the edges of the maze allow)
+    # Returns True if the camera moved
+    def follow(self):
+        if not self.scrolls:
+            return False
+        camera = self.camera.copy()
+        camera.center = self.player.rect.center
+        camera.clamp_ip(pygame.Rect((0, 0), self.maze.size()))
+        if camera == self.camera:
+            return False
+        self.camera = camera
+        return True
+
+    # Where a rect in maze pixels is on screen
+    def to_screen(self, rect):
+        return rect.move(self.viewport.left - self.camera.left, self.viewport.top - self.camera.top)
+
+    # React to an event from GameState.step(), a listener of the game (see Game.GameState.add_listener())
+    def handle(self, event, gc):
+        self.hud_changed = True
+        if event == Game.DOT_EATEN:
+            # Patch the background where the dot was
+            dot_rect = pygame.Rect(0, 0, 10, 10)
+            dot_rect.center = cell_center(gc, self.cell_size)
+            self.maze.fill(WHITE, dot_rect)
+            dot_rect = self.to_screen(dot_rect).clip(self.viewport)
+            if dot_rect:
+                self.background.fill(WHITE, dot_rect)
+                self.prev_dirty.append(dot_rect)
+
+    # Draw characters that are on screen (in a single Surface.blits() call), returns list of areas of screen they cover
+    def draw_characters(self):
+        self.screen.set_clip(self.viewport)
+        camera = self.camera
+        blits = [(player.image, self.to_screen(player.rect)) for player in self.players if camera.colliderect(player.rect)]
+        blits.extend((ghost.image, self.to_screen(ghost.rect)) for ghost in self.ghosts if camera.colliderect(ghost.rect))
+        dirty = self.screen.blits(blits)
+        self.screen.set_clip(None)
+        return dirty
+
+    # Draw the whole screen
+    def draw_all(self):
+        for player in self.players:
+            player.align()
+        for ghost in self.ghosts:
+            ghost.align()
+        if self.follow():
+            self.background = self.draw_background()
+
+        self.screen.blit(self.background, (0, 0))
+        self.prev_dirty = self.draw_characters()
+
+        self.hud.reset()
+        self.draw_hud()
+
+        pygame.display.update()
+
+    # Draw Points/Lives, returns list of areas of screen that changed
+    def draw_hud(self):
+        self.hud_changed = False
+        config = self.config
+        dirty = self.hud.show(self.screen, "Points: " + str(self.state.player.points), (config.grid_width+(config.width-config.grid_width)/2, config.height/3))
+        dirty.extend(self.hud.show(self.screen, "Lives: " + str(self.state.player.lives), (config.grid_width+(config.width-config.grid_width)/2, config.height*2/3)))
+        return dirty
+
+    # Where the profiler's overlay goes (in the side panel, below Points/Lives)
+    def overlay_topleft(self):
+        return (self.config.grid_width + 20, self.config.height*3/4)
+
+    # Move sprites to where the characters are
+    # The game runs in fixed time steps, and alpha is how far (from 0 to 1) the time is between the last step and the next,
+    # so that characters move smoothly however often (or rarely) frames are drawn
+    # Returns True if the camera moved (the background of the whole grid area changed)
+    def update(self, alpha):
+        state = self.state
+
+        image_num = self.ghost_animation[state.frames % len(self.ghost_animation)]
+        if image_num != self.ghost_image_num:
+            self.ghost_image_num = image_num
+            for ghost in self.ghosts:
+                ghost.change_image(image_num)
+        if self.profiler:
+            self.profiler.lap("animation")
+
+        for player in self.players:
+            player.update(min(1, (state.player_frame_num+1+alpha) / self.config.player_frames_per_cycle))
+        self.ghosts.update(min(1, (state.ghost_frame_num+1+alpha) / self.config.ghost_frames_per_cycle))
+        if self.profiler:
+            self.profiler.lap("sprites")
+
+        if not self.follow():
+            return False
+        self.background.fill(BLACK, self.viewport)
+        self.maze.draw(self.background, self.camera, self.viewport.topleft)
+        return True
+
+    # Draw a single frame, only updating areas of the screen that have changed
+    def draw(self, alpha=0):
+        if len(self.prev_dirty) > MAX_DIRTY_RECTS:
+            self.draw_full(alpha)
+            return
+
+        dirty = self.prev_dirty # Parts of screen that need updating
+
+        # Clean up where characters were
+        for rect in dirty:
+            self.screen.blit(self.background, rect, rect)
+        if self.profiler:
+            self.profiler.lap("draw")
+
+        if self.update(alpha):
+            dirty.append(self.screen.blit(self.background, self.viewport, self.viewport))
+
+        # Draw characters where they are now
+        self.prev_dirty = self.draw_characters()
+        dirty.extend(self.prev_dirty)
+
+        if self.hud_changed:
+            dirty.extend(self.draw_hud())
+        if self.profiler:
+            dirty.extend(self.profiler.draw_overlay(self.screen, topleft=self.overlay_topleft()))
+            self.profiler.lap("draw")
+
+        pygame.display.update(dirty)
+        if self.profiler:
+            self.profiler.lap("display")
+
+    # Draw a single frame by redrawing the whole screen (much slower than draw(), kept to compare against)
+    def draw_full(self, alpha=0):
+        self.update(alpha)
+
+        self.screen.blit(self.background, (0, 0))
+        self.prev_dirty = self.draw_characters()
+
+        self.hud.reset()
+        self.draw_hud()
+        if self.profiler:
+            self.profiler.draw_overlay(self.screen, redraw=True, topleft=self.overlay_topleft())
+            self.profiler.lap("draw")
+
+        pygame.display.update()
+        if self.profiler:
+            self.profiler.lap("display")
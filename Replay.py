@@ -0,0 +1,145 @@
+# Recording and replaying games
+# Everything random in a game comes from its seed (see Game.GameState), so a game is fully described by its maze, its seed
+# and the changes of direction the player made (GameState.inputs), which makes for a very small file
+# A replay can be simulated without a display as fast as possible (e.g. to check a result is reproduced), or drawn
+# Run as a script to replay a file, e.g. python Replay.py replays/last.replay --render
+import argparse
+import collections
+import os
+import struct
+import sys
+
+from configs import *
+import Game, GameConfig, GameGrid, PathTable
+
+LAST_GAME_FILE = os.path.join("replays", "last.replay")
+
+# Header: magic, version, rows, cols, seed, number of frames played, number of inputs, result (win, points, total points),
+# number of ghosts, ghost AI (index into Game.GHOST_AIS), player frames per cycle, ghost frames per cycle
+FILE_HEADER = struct.Struct("<4sBIIqII?IIIBHH")
+FILE_MAGIC = b"DGRP"
+FILE_VERSION = 4
+
+# Headers of older versions, with the values of the fields they are missing
+OLD_FILE_HEADERS = {
+    1: (struct.Struct("<4sBIIqII?II"), (GHOSTS, 0, PLAYER_FRAMES_PER_CYCLE, GHOST_FRAMES_PER_CYCLE)), # Always GHOSTS ghosts with the "paths" AI
+    2: (struct.Struct("<4sBIIqII?III"), (0, PLAYER_FRAMES_PER_CYCLE, GHOST_FRAMES_PER_CYCLE)), # Always the "paths" AI
+    3: (struct.Struct("<4sBIIqII?IIIB"), (PLAYER_FRAMES_PER_CYCLE, GHOST_FRAMES_PER_CYCLE)) # Always the default frames per cycle
+}
+
+# Each input: cycle, direction (index into INPUT_DIRECTIONS)
+INPUT = struct.Struct("<IB")
+INPUT_DIRECTIONS = PathTable.MOVES
+
+# config is a GameConfig.GameConfig with the parameters that change how the game plays out (the rest are defaults)
+Recording = collections.namedtuple("Recording", ["game_grid", "seed", "frames", "inputs", "result", "config"])
+
+
+def save(file, state):
+    directory = os.path.dirname(file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    won, points, total_dots = state.result()
+    grid = state.game_grid
+    with open(file, "wb") as f:
+        f.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, grid.rows, grid.cols, state.seed, state.frames, len(state.inputs),
+                                 won, points, total_dots, len(state.ghosts), Game.GHOST_AIS.index(state.ai),
+                                 state.config.player_frames_per_cycle, state.config.ghost_frames_per_cycle))
+        f.write(GameGrid.pack_bits(grid.walkable))
+        for cycle, direction in state.inputs:
+            f.write(INPUT.pack(cycle, INPUT_DIRECTIONS.index(direction)))
+
+
+def load(file):
+    with open(file, "rb") as f:
+        start = f.read(5)
+        if start[:4] != FILE_MAGIC or not (start[4] == FILE_VERSION or start[4] in OLD_FILE_HEADERS):
+            raise ValueError(file + " is not a replay file")
+
+        header, missing = (FILE_HEADER, ()) if start[4] == FILE_VERSION else OLD_FILE_HEADERS[start[4]]
+        fields = header.unpack(start + f.read(header.size - 5)) + missing
+        magic, version, rows, cols, seed, frames, num_inputs, won, points, total_dots, ghosts, ai, player_fpc, ghost_fpc = fields
+
+        walkable = GameGrid.unpack_bits(f.read((rows*cols + 7) // 8), rows*cols)
+        inputs = [(cycle, INPUT_DIRECTIONS[code]) for cycle, code in INPUT.iter_unpack(f.read(INPUT.size * num_inputs))]
+
+    config = GameConfig.GameConfig(ghosts=ghosts, ai=Game.GHOST_AIS[ai], player_frames_per_cycle=player_fpc, ghost_frames_per_cycle=ghost_fpc)
+    return Recording(GameGrid.GameGrid(walkable, cols), seed, frames, inputs, (won, points, total_dots), config)
+
+
+# Game that follows a recording, advanced one frame at a time with step()
+class Replayer:
+    def __init__(self, recording):
+        self.recording = recording
+        self.state = Game.GameState(recording.game_grid, recording.seed, config=recording.config)
+        self.pending = collections.deque(recording.inputs)
+
+    def over(self):
+        return self.state.over() or self.state.frames >= self.recording.frames
+
+    # Advance one frame, returns the list of events that happened (see GameState.step())
+    def step(self):
+        state = self.state
+
+        # Directions are only used at the start of a player cycle, so give the player its recorded direction just before
+        if self.pending and (state.frames+1) == self.pending[0][0] * state.config.player_frames_per_cycle:
+            state.next_dir = self.pending.popleft()[1]
+        return state.step()
+
+    # Simulate the rest of the recording without drawing, returns the result
+    def run(self):
+        while not self.over():
+            self.step()
+        return self.state.result()
+
+
+# Draw a recording in a window, speed is how many times faster than real time
+def render(recording, speed=1):
+    import pygame
+    import Assets, Render
+
+    pygame.init()
+    config = recording.config
+    screen = pygame.display.set_mode((config.width, config.height))
+    clock = pygame.time.Clock()
+
+    replayer = Replayer(recording)
+    player_images, ghost_images = Render.load_character_images(config, config.cell_size(recording.game_grid.rows, recording.game_grid.cols))
+    renderer = Render.Renderer(screen, replayer.state, player_images, ghost_images, Assets.load_font("resources/text/courier.ttf", FONT_SIZE))
+    renderer.draw_all()
+
+    while not replayer.over():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return replayer.state.result()
+        for i in range(speed):
+            if not replayer.over():
+                replayer.step()
+        renderer.draw()
+        clock.tick(config.ticks_per_second)
+
+    return replayer.state.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded game.")
+    parser.add_argument("file", nargs="?", default=LAST_GAME_FILE)
+    parser.add_argument("--render", action="store_true", help="draw the game instead of simulating it as fast as possible")
+    parser.add_argument("--speed", type=int, default=1)
+    args = parser.parse_args()
+
+    recording = load(args.file)
+    if args.render:
+        res = render(recording, args.speed)
+    else:
+        res = Replayer(recording).run()
+
+    print("Recorded:", recording.result)
+    print("Replayed:", res)
+    if res != recording.result:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# Event loop for screens that only react to input (the menu and the end screen)
+# Instead of checking for events 100 times a second, the loop sleeps until there is an event,
+# and animations are driven by a timer event, so an idle screen uses almost no CPU
+import sys
+
+import pygame
+
+# Event posted by the animation timer
+ANIMATE = pygame.USEREVENT
+
+
+# Run a screen until it is left
+# handle is called with every input event, and the screen is left as soon as it returns something other than None (which is returned)
+# If animate is given, it is called every interval milliseconds
+def run(handle, animate=None, interval=None):
+    if animate:
+        pygame.time.set_timer(ANIMATE, interval)
+    try:
+        while True:
+            event = pygame.event.wait()
+            if event.type == pygame.QUIT:
+                sys.exit()
+            elif event.type == ANIMATE:
+                if animate:
+                    animate()
+            else:
+                res = handle(event)
+                if res is not None:
+                    return res
+    finally:
+        if animate:
+            pygame.time.set_timer(ANIMATE, 0)
+            pygame.event.clear(ANIMATE)
@@ -0,0 +1,196 @@
+# Game server
+# Runs games without a display and is the only place the rules are applied: clients (see Client.py) only send the
+# directions their player takes and draw the changes they're sent (see Network.py)
+# Players join a room by name, and the room's game starts once it has as many players as it needs
+# One loop steps every running room a player cycle at a time (directions only matter at the start of a cycle), so a
+# process can run many rooms without a timer for each
+# Run as a script, e.g. python Server.py --port 5555 --players 2
+import argparse
+import asyncio
+import random
+import struct
+
+from configs import *
+import Game, GameConfig, Maze, Network
+
+HOST = "localhost"
+PORT = 5555
+
+# Clients that fall this far behind (bytes not sent yet) are disconnected rather than buffered for forever
+MAX_BUFFERED = 1 << 20
+
+
+class Room:
+    # config is the GameConfig.GameConfig of the room's game
+    def __init__(self, name, players=1, config=GameConfig.DEFAULT, seed=None):
+        self.name = name
+        self.players = players
+        self.config = config
+        self.seed = seed
+
+        # Writers (asyncio.StreamWriter) of the clients in the room, a client's player number is its place in this list
+        self.clients = []
+
+        self.state = None
+        self.encoder = None
+
+        # Grid coordinates of dots eaten since the last update
+        self.eaten = []
+
+    def full(self):
+        return len(self.clients) == self.players
+
+    def join(self, writer):
+        self.clients.append(writer)
+        if self.full():
+            self.start()
+
+    # A client left, before the game started it's forgotten, after that its player is out of the game
+    def leave(self, writer):
+        if writer not in self.clients:
+            return
+        if not self.state:
+            self.clients.remove(writer)
+            return
+        num = self.clients.index(writer)
+        self.clients[num] = None
+        self.state.players[num].lives = 0
+
+    def steer(self, writer, direction):
+        if self.state and writer in self.clients:
+            self.state.steer(direction, self.clients.index(writer))
+
+    def start(self):
+        # Played on the default maze, or on a maze generated from the room's seed if the config asks for another size
+        game_grid = DEFAULT_GAME_GRID
+        if (self.config.rows, self.config.cols) != (len(DEFAULT_GAME_GRID), len(DEFAULT_GAME_GRID[0])):
+            game_grid = Maze.generate(self.config.rows, self.config.cols, self.seed)
+        self.state = Game.GameState(game_grid, self.seed, players=self.players, config=self.config)
+        self.state.add_listener(self.record)
+        self.encoder = Network.DeltaEncoder(self.state)
+        for num, writer in enumerate(self.clients):
+            self.send(writer, Network.encode_welcome(self.state, num))
+
+    def send(self, writer, message):
+        if writer is None or writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > MAX_BUFFERED:
+            writer.close()
+            return
+        writer.write(message)
+
+    # Keep every dot eaten for the next update, a listener of the game (see Game.GameState.add_listener())
+    def record(self, event, gc):
+        if event == Game.DOT_EATEN:
+            self.eaten.append(gc)
+
+    # Simulate a player cycle and send what changed to every client
+    def cycle(self):
+        state = self.state
+        for i in range(self.config.player_frames_per_cycle):
+            state.step()
+            if state.over():
+                break
+
+        update = self.encoder.update(self.eaten)
+        self.eaten = []
+        for writer in self.clients:
+            self.send(writer, update)
+
+    def close(self):
+        for writer in self.clients:
+            if writer is not None:
+                writer.close()
+
+
+class GameServer:
+    def __init__(self, players=1, config=GameConfig.DEFAULT):
+        self.players = players
+        self.config = config
+
+        # Rooms waiting for players by name, and rooms with a game going on
+        self.waiting = {}
+        self.running = []
+
+        # Number of games finished, and cycles simulated over every room
+        self.games = 0
+        self.cycles = 0
+
+    # Room to join by name, a room that has already started is left to finish and a new one takes its name
+    def room(self, name):
+        if name not in self.waiting:
+            self.waiting[name] = Room(name, self.players, self.config, random.randrange(2**32))
+        return self.waiting[name]
+
+    async def handle_client(self, reader, writer):
+        room = None
+        try:
+            message_type, body = await Network.read_message(reader)
+            if message_type != Network.JOIN:
+                return
+            room = self.room(body.decode())
+            room.join(writer)
+            if room.full():
+                del self.waiting[room.name]
+                self.running.append(room)
+
+            while True:
+                message_type, body = await Network.read_message(reader)
+                if message_type == Network.DIRECTION:
+                    room.steer(writer, Network.decode_direction(body))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, IndexError, UnicodeDecodeError, struct.error):
+            pass
+        finally:
+            if room:
+                room.leave(writer)
+                # A room everyone left before it started is forgotten, so made up room names don't pile up
+                if not room.clients and self.waiting.get(room.name) is room:
+                    del self.waiting[room.name]
+            writer.close()
+
+    # Step every running room a player cycle at a time, in real time
+    async def run_rooms(self):
+        loop = asyncio.get_running_loop()
+        cycle_time = self.config.player_frames_per_cycle / self.config.ticks_per_second
+        next_time = loop.time()
+        while True:
+            for room in self.running:
+                room.cycle()
+            self.cycles += len(self.running)
+
+            finished = [room for room in self.running if room.state.over()]
+            for room in finished:
+                room.close()
+                self.running.remove(room)
+            self.games += len(finished)
+
+            # Don't try to catch up after falling behind (e.g. too many rooms), the games just slow down
+            next_time = max(next_time + cycle_time, loop.time())
+            await asyncio.sleep(next_time - loop.time())
+
+    # Serve until cancelled, started (a future) is given the port being listened on once the server is up
+    async def serve(self, host=HOST, port=PORT, started=None):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        if started:
+            started.set_result(server.sockets[0].getsockname()[1])
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.run_rooms())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a game server.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--players", type=int, default=1, help="players in each room")
+    GameConfig.GameConfig.add_arguments(parser)
+    args = parser.parse_args()
+
+    print("Serving on " + args.host + ":" + str(args.port))
+    try:
+        asyncio.run(GameServer(args.players, GameConfig.GameConfig.from_args(args)).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
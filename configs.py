@@ -41,6 +41,10 @@ DEFAULT_GAME_GRID = [
     [1,1,1,1,1,1,1,1,1,1,1,1,0,1,1,1,1,1,1,1,1,1,1,1,1]
 ]
 
+# Number of rows/cols of a large maze, which is larger than the grid area and scrolls to follow the player
+LARGE_ROW = 101
+LARGE_COL = 101
+
 # Make sure ROW and COL check out
 assert len(DEFAULT_GAME_GRID) == ROW and all((len(i) == COL for i in DEFAULT_GAME_GRID))
 
@@ -52,6 +56,19 @@ TEAL = (50, 130, 160)
 
 # Ghosts
 GHOSTS = 5
+# Number of ghost images (resources/ghost), ghosts past this many reuse them
+GHOST_IMAGE_SETS = 5
+# Number of ghosts in swarm mode
+SWARM_GHOSTS = 300
+# How ghosts plan their moves (see Game.GHOST_AIS)
+GHOST_AI = "paths"
+
+# The game is simulated in fixed time steps, which are the "frames" of the Character implementation
+# Drawing happens separately, as often as the computer can manage (up to FRAMES_PER_SECOND)
+TICKS_PER_SECOND = 100
+FRAMES_PER_SECOND = 100
+# Longest time simulated in one go, so a very slow frame (or the window being dragged) doesn't make the game race to catch up
+MAX_FRAME_TIME = 0.25
 
 # Number of "frames" per "cycle" (see Character implementation for details)
 # A good number is a factor of the number of pixels in a single grid unit
@@ -60,6 +77,10 @@ GHOST_FRAMES_PER_CYCLE = 26
 # Number of frames in ghost animation
 ANIMATION_FRAMES = 6
 FRAMES_PER_ANIMATION_CYCLE = 20
+# Milliseconds between ghost animation frames on the menu
+MENU_ANIMATION_INTERVAL = 130
+# Load what a game needs (images, fonts and the next random maze) on a background thread while the menu is shown
+PRELOAD = True
 
 # Fonts
 FONT_SIZE = 30
\ No newline at end of file